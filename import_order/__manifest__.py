@@ -5,11 +5,16 @@
     'category': 'Purchase',
     'author': 'Antigravity / User',
     'depends': ['base', 'stock', 'product_manufacturer', 'purchase'],
+    'external_dependencies': {
+        'python': ['openpyxl', 'xlrd'],
+    },
     'data': [
         'security/ir.model.access.csv',
         'data/sequence.xml',
+        'data/ir_cron.xml',
         'wizard/import_order_line_wizard_views.xml',
         'views/import_order_views.xml',
+        'views/import_order_report_views.xml',
     ],
     'installable': True,
     'application': True,
@@ -1,2 +1,4 @@
 from . import import_order
 from . import purchase_order
+from . import product_template
+from . import import_order_report
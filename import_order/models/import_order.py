@@ -1,4 +1,31 @@
+import re
+
+from psycopg2.extras import execute_values
+
 from odoo import models, fields, api, _
+from odoo.tools import split_every
+
+# Source states accepted by the mass state change, per target state
+# (mirrors the visibility of the form buttons).
+STATE_TRANSITIONS = {
+    'done': ['draft'],
+    'cancel': ['draft'],
+    'draft': ['cancel'],
+}
+
+
+def normalize_reference(reference):
+    """ Tolerant matching key of a reference: casefolded, float artefacts
+    canonicalized ('ABC.0' -> 'abc', '12.50' -> '12.5') and separators and
+    whitespace removed, so 'PO001 - ABC', 'po001-abc ' and 'PO001-ABC.0'
+    all give 'po001abc'. A dot between digits is a decimal point and is kept
+    ('1.25' and '12.5' stay different). """
+    if reference is None or reference is False:
+        return ''
+    key = str(reference).strip().casefold()
+    key = re.sub(r'\.0+(?![\w.])', '', key)
+    key = re.sub(r'(\.\d*?[1-9])0+(?![\w.])', r'\1', key)
+    return re.sub(r'[\s\-_/\\]+|(?<!\d)\.|\.(?!\d)', '', key)
 
 class ImportOrder(models.Model):
     _name = 'x_import_order'
@@ -22,26 +49,113 @@ class ImportOrder(models.Model):
 
     @api.depends('line_ids.price_subtotal')
     def _compute_total(self):
-        for order in self:
+        # Saved orders: one grouped SUM for the whole batch
+        saved_orders = self.filtered(lambda o: isinstance(o.id, int))
+        totals = {}
+        if saved_orders:
+            groups = self.env['x_import_order_line']._read_group(
+                [('import_order_id', 'in', saved_orders.ids)],
+                ['import_order_id', 'price_subtotal:sum'],
+                ['import_order_id'],
+            )
+            totals = {group['import_order_id'][0]: group['price_subtotal'] for group in groups}
+        for order in saved_orders:
+            order.amount_total = totals.get(order.id, 0.0)
+        # Orders being edited in a form are not in the database yet
+        for order in self - saved_orders:
             order.amount_total = sum(order.line_ids.mapped('price_subtotal'))
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_to_name = [vals for vals in vals_list if vals.get('name', _('New')) == _('New')]
+        if vals_to_name:
+            names = self._reserve_names(len(vals_to_name))
+            for vals, name in zip(vals_to_name, names):
+                vals['name'] = name or _('New')
+        return super(ImportOrder, self).create(vals_list)
+
     @api.model
-    def create(self, vals):
-        if vals.get('name', _('New')) == _('New'):
-            vals['name'] = self.env['ir.sequence'].next_by_code('x_import_order') or _('New')
-        return super(ImportOrder, self).create(vals)
+    def _reserve_names(self, count):
+        """ Reserves `count` consecutive names of the 'x_import_order' sequence
+        in a single statement instead of one next_by_code() call per order. """
+        self.check_access_rights('create')
+        company_id = self.env.company.id
+        sequence = self.env['ir.sequence'].sudo().search([
+            ('code', '=', 'x_import_order'),
+            ('company_id', 'in', [company_id, False]),
+        ], order='company_id', limit=1)
+        if not sequence or sequence.use_date_range or count == 1:
+            # Date range sequences keep their own counters, use the standard API
+            return [self.env['ir.sequence'].next_by_code('x_import_order') for _i in range(count)]
+
+        if sequence.implementation == 'standard':
+            self.env.cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                ('ir_sequence_%03d' % sequence.id, count)
+            )
+            numbers = [row[0] for row in self.env.cr.fetchall()]
+        else:
+            self.env.cr.execute(
+                "SELECT number_next FROM ir_sequence WHERE id = %s FOR UPDATE NOWAIT", [sequence.id]
+            )
+            number_next = self.env.cr.fetchone()[0]
+            self.env.cr.execute(
+                "UPDATE ir_sequence SET number_next = number_next + %s WHERE id = %s",
+                (sequence.number_increment * count, sequence.id)
+            )
+            sequence.invalidate_recordset(['number_next'])
+            numbers = [number_next + i * sequence.number_increment for i in range(count)]
+
+        prefix, suffix = sequence._get_prefix_suffix()
+        return [prefix + '%%0%sd' % sequence.padding % number + suffix for number in numbers]
+
+    @api.model
+    def create_with_lines(self, orders_vals, batch_size=500):
+        """ Bulk creation API for external feeds.
+        orders_vals: list of order values whose 'line_ids' is a list of line values
+        (plain dicts or (0, 0, vals) commands).
+        Orders and their lines are created with one multi-create each per batch. """
+        orders = self.browse()
+        for start in range(0, len(orders_vals), batch_size):
+            batch = orders_vals[start:start + batch_size]
+            order_vals_list = []
+            lines_per_order = []
+            for vals in batch:
+                vals = dict(vals)
+                lines = vals.pop('line_ids', None) or []
+                lines_per_order.append([line[2] if isinstance(line, (list, tuple)) else line for line in lines])
+                order_vals_list.append(vals)
+
+            batch_orders = self.create(order_vals_list)
+            line_vals_list = [
+                dict(line_vals, import_order_id=order.id)
+                for order, lines in zip(batch_orders, lines_per_order)
+                for line_vals in lines
+            ]
+            if line_vals_list:
+                self.env['x_import_order_line'].create(line_vals_list)
+            orders |= batch_orders
+        return orders
 
     def action_confirm(self):
-        for order in self:
-            order.write({'state': 'done'})
+        self.write({'state': 'done'})
 
     def action_cancel(self):
-        for order in self:
-            order.write({'state': 'cancel'})
+        self.write({'state': 'cancel'})
 
     def action_draft(self):
-        for order in self:
-            order.write({'state': 'draft'})
+        self.write({'state': 'draft'})
+
+    def action_mass_change_state(self, target_state, chunk_size=1000):
+        """ Used by the list view server actions: moves the selected orders
+        allowed by STATE_TRANSITIONS to target_state, one write per chunk. """
+        orders = self.filtered(lambda o: o.state in STATE_TRANSITIONS[target_state])
+        for order_ids in split_every(chunk_size, orders.ids):
+            chunk = self.browse(order_ids)
+            chunk.write({'state': target_state})
+            chunk.flush_recordset()
+            chunk.invalidate_recordset()
+        return True
 
 class ImportOrderLine(models.Model):
     _name = 'x_import_order_line'
@@ -50,7 +164,9 @@ class ImportOrderLine(models.Model):
     import_order_id = fields.Many2one('x_import_order', string='Import Order', ondelete='cascade')
     state = fields.Selection(related='import_order_id.state', string='Order Status', readonly=True, store=True)
     product_id = fields.Many2one('product.product', string='Product', required=True)
-    x_teknik_referans = fields.Char(string='Teknik Referans', compute='_compute_teknik_referans', store=True)
+    x_teknik_referans = fields.Char(string='Teknik Referans', compute='_compute_teknik_referans', store=True, index=True)
+    x_reference_key = fields.Char(string='Referans Anahtarı', compute='_compute_reference_key', store=True, index=True,
+                                  help="Normalized Teknik Referans used for tolerant Excel matching.")
     quantity = fields.Float(string='Quantity', default=1.0, required=True)
     x_qty_incoming = fields.Float(string='Incoming', default=0.0)
     product_uom_id = fields.Many2one('uom.uom', string='Unit of Measure', related='product_id.uom_id', readonly=True, store=True)
@@ -72,3 +188,46 @@ class ImportOrderLine(models.Model):
                 line.x_teknik_referans = f"{order_name}-{pref}"
             else:
                 line.x_teknik_referans = order_name or pref
+
+    @api.depends('x_teknik_referans')
+    def _compute_reference_key(self):
+        for line in self:
+            line.x_reference_key = normalize_reference(line.x_teknik_referans) or False
+
+    def _recompute_teknik_referans_sql(self, products):
+        """ Set-based equivalent of _compute_teknik_referans for all lines of `products`.
+        Lines already marked for recompute by the ORM are taken out of the queue. """
+        if not products:
+            return self.browse()
+        self.env['x_import_order'].flush_model(['name'])
+        self.flush_model(['import_order_id', 'product_id'])
+        self.env.cr.execute("""
+            UPDATE x_import_order_line line
+               SET x_teknik_referans = CASE
+                       WHEN COALESCE(ord.name, '') != '' AND COALESCE(tmpl.manufacturer_pref, '') != ''
+                           THEN ord.name || '-' || tmpl.manufacturer_pref
+                       ELSE NULLIF(COALESCE(NULLIF(ord.name, ''), tmpl.manufacturer_pref), '')
+                   END
+              FROM product_product product
+              JOIN product_template tmpl ON tmpl.id = product.product_tmpl_id,
+                   x_import_order_line src
+         LEFT JOIN x_import_order ord ON ord.id = src.import_order_id
+             WHERE src.id = line.id
+               AND product.id = line.product_id
+               AND line.product_id IN %s
+         RETURNING line.id, line.x_teknik_referans
+        """, [tuple(products.ids)])
+        rows = self.env.cr.fetchall()
+        # The normalized key follows the reference, in one UPDATE as well
+        if rows:
+            execute_values(self.env.cr._obj, """
+                UPDATE x_import_order_line line
+                   SET x_reference_key = data.reference_key
+                  FROM (VALUES %s) AS data(id, reference_key)
+                 WHERE line.id = data.id
+            """, [(line_id, normalize_reference(ref) or None) for line_id, ref in rows])
+        lines = self.browse([row[0] for row in rows])
+        self.env.remove_to_compute(self._fields['x_teknik_referans'], lines)
+        self.env.remove_to_compute(self._fields['x_reference_key'], lines)
+        lines.invalidate_recordset(['x_teknik_referans', 'x_reference_key'])
+        return lines
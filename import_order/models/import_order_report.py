@@ -0,0 +1,70 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError
+
+
+class ImportOrderReport(models.Model):
+    """ Open quantities of import orders versus purchase lines, per supplier and product.
+    Backed by a materialized view refreshed by cron (_refresh_view) or on demand by purchase managers. """
+    _name = 'x_import_order_report'
+    _description = 'Import Order Open Quantity Report'
+    _auto = False
+    _order = 'partner_id, product_id'
+
+    partner_id = fields.Many2one('res.partner', string='Supplier', readonly=True)
+    product_id = fields.Many2one('product.product', string='Product', readonly=True)
+    ordered_qty = fields.Float(string='Ordered', readonly=True)
+    incoming_qty = fields.Float(string='Incoming', readonly=True)
+    purchased_qty = fields.Float(string='Purchased', readonly=True)
+    open_qty = fields.Float(string='Open', readonly=True)
+    line_count = fields.Integer(string='# Lines', readonly=True)
+
+    def _query(self):
+        return """
+            WITH purchased AS (
+                SELECT pol.import_order_line_id, SUM(pol.product_uom_qty) AS qty
+                  FROM purchase_order_line pol
+                  JOIN purchase_order po ON po.id = pol.order_id
+                 WHERE pol.import_order_line_id IS NOT NULL
+                   AND po.state != 'cancel'
+              GROUP BY pol.import_order_line_id
+            )
+            SELECT MIN(line.id) AS id,
+                   ord.partner_id AS partner_id,
+                   line.product_id AS product_id,
+                   SUM(line.quantity) AS ordered_qty,
+                   SUM(line.x_qty_incoming) AS incoming_qty,
+                   SUM(COALESCE(purchased.qty, 0.0)) AS purchased_qty,
+                   SUM(line.quantity) - SUM(COALESCE(purchased.qty, 0.0)) AS open_qty,
+                   COUNT(*) AS line_count
+              FROM x_import_order_line line
+              JOIN x_import_order ord ON ord.id = line.import_order_id
+         LEFT JOIN purchased ON purchased.import_order_line_id = line.id
+             WHERE ord.state != 'cancel'
+          GROUP BY ord.partner_id, line.product_id
+        """
+
+    def init(self):
+        self.env.cr.execute("DROP MATERIALIZED VIEW IF EXISTS %s CASCADE" % self._table)
+        self.env.cr.execute("CREATE MATERIALIZED VIEW %s AS (%s)" % (self._table, self._query()))
+        # The unique index allows REFRESH ... CONCURRENTLY (reports stay readable)
+        self.env.cr.execute("CREATE UNIQUE INDEX %s_id_idx ON %s (id)" % (self._table, self._table))
+        self.env.cr.execute("CREATE INDEX %s_partner_product_idx ON %s (partner_id, product_id)" % (self._table, self._table))
+        self.env.cr.execute("CREATE INDEX %s_product_idx ON %s (product_id)" % (self._table, self._table))
+
+    @api.model
+    def _refresh_view(self):
+        self.env.flush_all()
+        self.env.cr.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY %s" % self._table)
+        self.invalidate_model()
+        return True
+
+    @api.model
+    def action_refresh(self):
+        # The refresh scans every import order line, keep it away from plain users
+        if not self.user_has_groups('purchase.group_purchase_manager'):
+            raise AccessError(_("Açık miktar raporunu sadece satınalma yöneticileri yenileyebilir."))
+        self._refresh_view()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
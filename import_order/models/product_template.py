@@ -0,0 +1,14 @@
+from odoo import models
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    def write(self, vals):
+        res = super(ProductTemplate, self).write(vals)
+        if 'manufacturer_pref' in vals:
+            # A prefix rename can touch thousands of import order lines,
+            # recompute their stored reference with one UPDATE instead of the ORM.
+            self.flush_recordset(['manufacturer_pref'])
+            self.env['x_import_order_line']._recompute_teknik_referans_sql(self.product_variant_ids)
+        return res
@@ -0,0 +1,3 @@
+from . import test_import_order_line_wizard
+from . import test_import_order
+from . import test_excel_readers
@@ -0,0 +1,68 @@
+import io
+from unittest import skipIf
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import xlwt
+except ImportError:
+    xlwt = None
+
+from odoo.exceptions import UserError
+from odoo.tests.common import BaseCase
+
+from odoo.addons.import_order.wizard import excel_readers
+
+HEADER = ['Ref', 'Quantity', 'Price']
+ROWS = [['PO001-ABC', 5.0, 1.5], ['PO002-XYZ', 2.0, 10.0]]
+
+
+class TestExcelReaders(BaseCase):
+
+    def assertRows(self, file_data, file_format, rows, file_name=None):
+        self.assertEqual(excel_readers.detect_format(file_data, file_name), file_format)
+        self.assertEqual([list(row) for row in excel_readers.iter_rows(file_data, file_name)], rows)
+
+    @skipIf(openpyxl is None, "openpyxl is not installed")
+    def test_01_xlsx(self):
+        """ xlsx files are read by their signature, whatever their name """
+        workbook = openpyxl.Workbook()
+        for row in [HEADER] + ROWS:
+            workbook.active.append(row)
+        output = io.BytesIO()
+        workbook.save(output)
+        self.assertRows(output.getvalue(), 'xlsx', ROWS, 'order.xlsx')
+        self.assertRows(output.getvalue(), 'xlsx', ROWS, 'order.csv')
+
+    @skipIf(xlwt is None, "xlwt is not installed")
+    def test_02_xls(self):
+        """ Legacy xls files are read by their signature """
+        workbook = xlwt.Workbook()
+        sheet = workbook.add_sheet('Sheet 1')
+        for row_index, row in enumerate([HEADER] + ROWS):
+            for col_index, value in enumerate(row):
+                sheet.write(row_index, col_index, value)
+        output = io.BytesIO()
+        workbook.save(output)
+        self.assertRows(output.getvalue(), 'xls', ROWS, 'order.xls')
+
+    def test_03_csv(self):
+        """ Text files are read as CSV, with the delimiter of the header line """
+        rows = [['PO001-ABC', '5', '1.5'], ['PO002-XYZ', '2', '10']]
+        self.assertRows(b'Ref,Quantity,Price\r\nPO001-ABC,5,1.5\r\nPO002-XYZ,2,10\r\n', 'csv', rows, 'order.csv')
+        self.assertRows('\ufeffRef;Quantity;Price\nPO001-ABC;5;1.5\nPO002-XYZ;2;10\n'.encode('utf-8'), 'csv', rows)
+        self.assertRows('Ref\tQuantity\tPrice\nŞ-1\t1\t2\n'.encode('utf-8'), 'csv', [['Ş-1', '1', '2']], 'order.txt')
+
+    def test_04_unsupported_content(self):
+        """ Binary or empty content is refused instead of being read as CSV """
+        for file_data, file_name in [
+            (b'%PDF-1.7\n\x00\x01\x02\xff', 'order.pdf'),
+            (b'\x89PNG\r\n\x1a\n\x00\x00', 'order.xlsx'),
+            ('Ref;Quantity\nŞ-1;1\n'.encode('cp1254'), 'order.csv'),
+            (b'', None),
+        ]:
+            with self.assertRaises(UserError, msg=file_name):
+                excel_readers.detect_format(file_data, file_name)
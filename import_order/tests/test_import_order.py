@@ -0,0 +1,213 @@
+import base64
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase, TransactionCase
+
+from odoo.addons.import_order.models.import_order import normalize_reference
+
+
+class TestNormalizeReference(BaseCase):
+
+    def assertSameKey(self, references, key):
+        self.assertEqual([normalize_reference(reference) for reference in references], [key] * len(references))
+
+    def test_01_case_and_whitespace(self):
+        """ Case and surrounding or inner whitespace do not matter """
+        self.assertSameKey(['PO001-ABC', ' po001-abc ', 'Po001-Abc\t', 'PO001 ABC'], 'po001abc')
+        self.assertSameKey(['STRASSE', 'straße'], 'strasse')
+
+    def test_02_separators(self):
+        """ Dashes, underscores, slashes and dots between words are separators """
+        self.assertSameKey(['PO001 - ABC', 'PO001_ABC', 'PO001/ABC', 'PO001\\ABC', 'PO001.ABC', 'PO001--ABC'], 'po001abc')
+
+    def test_03_numeric_cells(self):
+        """ Float artefacts of numeric Excel cells are canonicalized """
+        self.assertSameKey([12345.0, '12345.0', '12345', '12345.000'], '12345')
+        self.assertSameKey(['PO001-ABC.0', 'PO001-ABC'], 'po001abc')
+        self.assertSameKey([12.5, '12.50', '12.5'], '12.5')
+
+    def test_04_different_references_stay_different(self):
+        """ Normalization does not merge references that differ in content """
+        for reference, other in [
+            ('PO001-ABC', 'PO001-ABD'),
+            ('PO001-ABC', 'PO01-ABC'),
+            ('1.25', '12.5'),
+            ('12.05', '12.5'),
+            ('10.0.5', '10.5'),
+        ]:
+            self.assertNotEqual(normalize_reference(reference), normalize_reference(other), (reference, other))
+
+    def test_05_empty(self):
+        """ Empty cells give an empty key, which never matches """
+        self.assertSameKey([None, False, '', '   ', ' - '], '')
+
+
+@tagged('post_install', '-at_install')
+class TestReferenceKeyMatching(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestReferenceKeyMatching, cls).setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Reference Vendor Test'})
+        cls.product = cls.env['product.product'].create({'name': 'Reference Product', 'manufacturer_pref': 'ABC-12'})
+        cls.order = cls.env['x_import_order'].create({
+            'partner_id': cls.vendor.id,
+            'line_ids': [(0, 0, {'product_id': cls.product.id, 'quantity': 5.0})],
+        })
+        cls.line = cls.order.line_ids
+
+    def test_01_stored_key(self):
+        """ The stored key is the normalized Teknik Referans """
+        self.assertEqual(self.line.x_teknik_referans, '%s-ABC-12' % self.order.name)
+        self.assertEqual(self.line.x_reference_key, normalize_reference(self.line.x_teknik_referans))
+
+    def test_02_wizard_matches_on_key(self):
+        """ The wizard matches formatting variants of a reference, not other references """
+        name = self.order.name
+        references = [
+            '%s-ABC-12' % name,
+            ' %s - abc 12 ' % name.lower(),
+            '%s_ABC_12.0' % name,
+            '%s-ABC-13' % name,
+        ]
+        wizard = self.env['order.line.excel.import.wizard'].create({
+            'import_file': base64.b64encode(b'-'),
+            'line_ids': [(0, 0, {'reference': reference, 'quantity': 1.0}) for reference in references],
+        })
+        wizard.action_validate()
+        lines = wizard.line_ids.sorted('id')
+        self.assertEqual(lines.mapped('state'), ['success', 'success', 'success', 'failed'])
+        for line in lines[:3]:
+            self.assertEqual(line.match_ids, self.line)
+        self.assertFalse(lines[3].match_ids)
+
+
+@tagged('post_install', '-at_install')
+class TestBulkCreate(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestBulkCreate, cls).setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Bulk Vendor Test'})
+        cls.product = cls.env['product.product'].create({'name': 'Bulk Product', 'manufacturer_pref': 'BULK'})
+        cls.sequence = cls.env.ref('import_order.seq_x_import_order')
+
+    def _set_sequence(self, implementation, number_next=41, number_increment=1, use_date_range=False):
+        self.sequence.write({
+            'prefix': 'TST/',
+            'padding': 4,
+            'implementation': implementation,
+            'number_next': number_next,
+            'number_increment': number_increment,
+            'use_date_range': use_date_range,
+        })
+
+    def _create_orders(self, count):
+        return self.env['x_import_order'].create([{'partner_id': self.vendor.id} for _index in range(count)])
+
+    def test_01_standard_sequence(self):
+        """ Standard sequences reserve a batch of names with one nextval series """
+        self._set_sequence('standard')
+        orders = self._create_orders(5)
+        self.assertEqual(orders.mapped('name'), ['TST/%04d' % number for number in range(41, 46)])
+        orders = self.env['x_import_order'].create([
+            {'partner_id': self.vendor.id},
+            {'partner_id': self.vendor.id, 'name': 'MANUAL'},
+            {'partner_id': self.vendor.id},
+        ])
+        self.assertEqual(orders.mapped('name'), ['TST/0046', 'MANUAL', 'TST/0047'])
+        # A single order goes through next_by_code() and continues the series
+        self.assertEqual(self._create_orders(1).name, 'TST/0048')
+        self.sequence.invalidate_recordset()
+        self.assertEqual(self.sequence.number_next_actual, 49)
+
+    def test_02_no_gap_sequence(self):
+        """ No gap sequences reserve a batch of names by moving number_next once """
+        self._set_sequence('no_gap', number_increment=2)
+        orders = self._create_orders(5)
+        self.assertEqual(orders.mapped('name'), ['TST/%04d' % number for number in range(41, 51, 2)])
+        self.assertEqual(self.sequence.number_next, 51)
+        orders = self._create_orders(3)
+        self.assertEqual(orders.mapped('name'), ['TST/0051', 'TST/0053', 'TST/0055'])
+        self.assertEqual(self._create_orders(1).name, 'TST/0057')
+        self.sequence.invalidate_recordset()
+        self.assertEqual(self.sequence.number_next, 59)
+
+    def test_03_date_range_sequence(self):
+        """ Date range sequences keep their own counter, used through next_by_code() """
+        self._set_sequence('no_gap', use_date_range=True)
+        orders = self._create_orders(3)
+        self.assertEqual(orders.mapped('name'), ['TST/0001', 'TST/0002', 'TST/0003'])
+        self.assertEqual(self.sequence.date_range_ids.number_next_actual, 4)
+        self.assertEqual(self.sequence.number_next, 41)
+
+    def test_04_create_with_lines(self):
+        """ Orders and their lines are created in batches, names stay in feed order """
+        self._set_sequence('standard')
+        orders = self.env['x_import_order'].create_with_lines([{
+            'partner_id': self.vendor.id,
+            'line_ids': [(0, 0, {'product_id': self.product.id, 'quantity': quantity}),
+                         {'product_id': self.product.id, 'quantity': quantity + 1}],
+        } for quantity in (1.0, 3.0, 5.0)], batch_size=2)
+        self.assertEqual(orders.mapped('name'), ['TST/0041', 'TST/0042', 'TST/0043'])
+        self.assertEqual([order.line_ids.mapped('quantity') for order in orders], [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+        self.assertEqual(len(set(orders.line_ids.mapped('x_teknik_referans'))), 3)
+
+
+@tagged('post_install', '-at_install')
+class TestManufacturerPrefRename(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestManufacturerPrefRename, cls).setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Rename Vendor Test'})
+        attribute = cls.env['product.attribute'].create({
+            'name': 'Rename Size',
+            'value_ids': [(0, 0, {'name': name}) for name in ('S', 'M', 'L')],
+        })
+        cls.template = cls.env['product.template'].create({
+            'name': 'Rename Product',
+            'manufacturer_pref': 'OLD-1',
+            'attribute_line_ids': [(0, 0, {
+                'attribute_id': attribute.id,
+                'value_ids': [(6, 0, attribute.value_ids.ids)],
+            })],
+        })
+        cls.other_product = cls.env['product.product'].create({'name': 'Other Product', 'manufacturer_pref': 'OTHER'})
+        cls.orders = cls.env['x_import_order'].create([{
+            'partner_id': cls.vendor.id,
+            'line_ids': [(0, 0, {'product_id': product.id}) for product in cls.template.product_variant_ids | cls.other_product],
+        } for _index in range(2)])
+        cls.lines = cls.orders.line_ids.filtered(lambda line: line.product_id.product_tmpl_id == cls.template)
+        cls.other_lines = cls.orders.line_ids - cls.lines
+
+    def assertMatchesCompute(self, lines):
+        """ The stored values are the ones the ORM compute gives """
+        Line = self.env['x_import_order_line']
+        for field_name in ('x_teknik_referans', 'x_reference_key'):
+            self.assertFalse(self.env.records_to_compute(Line._fields[field_name]), field_name)
+        lines.invalidate_recordset(['x_teknik_referans', 'x_reference_key'])
+        self.env.cr.execute(
+            "SELECT id, x_teknik_referans, x_reference_key FROM x_import_order_line WHERE id IN %s", [tuple(lines.ids)]
+        )
+        stored = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+        for line in lines:
+            computed = Line.new({'import_order_id': line.import_order_id.id, 'product_id': line.product_id.id})
+            expected = (computed.x_teknik_referans or None, computed.x_reference_key or None)
+            self.assertEqual(stored[line.id], expected)
+            self.assertEqual((line.x_teknik_referans or None, line.x_reference_key or None), expected)
+
+    def test_01_rename_prefix(self):
+        """ Renaming the prefix of a template updates the lines of all its variants """
+        self.assertEqual(len(self.lines), 6)
+        self.template.write({'manufacturer_pref': 'New 2/B'})
+        self.assertMatchesCompute(self.lines | self.other_lines)
+        self.assertEqual(set(self.lines.mapped('x_teknik_referans')), {'%s-New 2/B' % order.name for order in self.orders})
+        self.assertEqual(set(self.lines.mapped('x_reference_key')), {'%snew2b' % order.name.lower().replace('/', '') for order in self.orders})
+        self.assertEqual(set(self.other_lines.mapped('x_teknik_referans')), {'%s-OTHER' % order.name for order in self.orders})
+
+    def test_02_clear_prefix(self):
+        """ Without a prefix the reference falls back to the order name """
+        self.template.write({'manufacturer_pref': False})
+        self.assertMatchesCompute(self.lines)
+        self.assertEqual(set(self.lines.mapped('x_teknik_referans')), set(self.orders.mapped('name')))
@@ -0,0 +1,113 @@
+import base64
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+
+@tagged('post_install', '-at_install')
+class TestCompactPreview(TransactionCase):
+
+    def setUp(self):
+        super(TestCompactPreview, self).setUp()
+        self.wizard = self.env['order.line.excel.import.wizard'].create({
+            'import_file': base64.b64encode(b'-'),
+            'preview_mode': 'compact',
+            'page_size': 10,
+        })
+        row_count = 25
+        self.wizard._set_preview_columns({
+            'reference': ['REF%s' % index for index in range(row_count)],
+            'quantity': [float(index) for index in range(row_count)],
+            'excel_price_unit': [1.0] * row_count,
+            'import_price_unit': [0.0] * row_count,
+            'state': ['failed' if index % 5 == 0 else 'pending' for index in range(row_count)],
+            'message': [''] * row_count,
+            'match_ids': [[] for _index in range(row_count)],
+        })
+        self.wizard.flush_recordset()
+        self.wizard.invalidate_recordset()
+
+    def test_01_read_page(self):
+        """ Reading a page has no side effects; the page actions store its rows """
+        PreviewLine = self.env['order.line.excel.import.line']
+        values = self.wizard.read(['page_line_ids', 'page_count'])[0]
+        self.assertEqual(values['page_count'], 3)
+        self.assertEqual(values['page_line_ids'], [])
+        self.assertFalse(PreviewLine.search([('wizard_id', '=', self.wizard.id)]))
+
+        self.wizard.action_next_page()
+        self.wizard.invalidate_recordset()
+        values = self.wizard.read(['page_line_ids', 'page'])[0]
+        self.assertEqual(values['page'], 2)
+        lines = PreviewLine.browse(values['page_line_ids'])
+        self.assertEqual(lines.mapped('row_index'), list(range(10, 20)))
+        self.assertEqual(lines.read(['reference'])[0]['reference'], 'REF10')
+        self.assertEqual(self.wizard.line_ids, lines)
+
+    def test_02_filter_page_and_edit(self):
+        """ Only the current page and edited rows stay stored, edits are merged into the columns """
+        self.wizard.with_context(page_filter='failed').action_set_page_filter()
+        page_line_ids = self.wizard.read(['page_line_ids'])[0]['page_line_ids']
+        lines = self.env['order.line.excel.import.line'].browse(page_line_ids)
+        self.assertEqual(lines.mapped('reference'), ['REF0', 'REF5', 'REF10', 'REF15', 'REF20'])
+
+        self.wizard.write({'page_line_ids': [(1, lines[1].id, {'quantity': 42.0})]})
+        self.wizard.invalidate_recordset()
+        self.assertEqual(self.wizard.read(['page_line_ids'])[0]['page_line_ids'], page_line_ids)
+
+        self.wizard.with_context(page_filter='all').action_set_page_filter()
+        self.wizard.action_next_page()
+        self.assertEqual(sorted(self.wizard.line_ids.mapped('row_index')), [5] + list(range(10, 20)))
+
+        columns = self.wizard._merge_edited_rows(self.wizard._get_preview_columns())
+        self.assertEqual(columns['quantity'][5], 42.0)
+        self.assertEqual(self.wizard._get_preview_columns()['quantity'][5], 5.0)
+
+
+@tagged('post_install', '-at_install')
+class TestConfirmJob(TransactionCase):
+
+    def test_01_partly_done_confirm_is_resumed_not_restarted(self):
+        """ A failed confirm job with committed chunks can only be resumed from its offset """
+        wizard = self.env['order.line.excel.import.wizard'].create({
+            'import_file': base64.b64encode(b'-'),
+            'state': 'validated',
+            'job_state': 'failed',
+            'job_step': 'confirm',
+            'job_offset': 2000,
+        })
+        for action in ('action_confirm', 'action_confirm_async', 'action_reset', 'action_validate'):
+            with self.assertRaises(UserError):
+                getattr(wizard, action)()
+
+        wizard.action_resume_job()
+        self.assertRecordValues(wizard, [{'job_state': 'queued', 'job_step': 'confirm', 'job_offset': 2000}])
+
+    def test_02_vacuum_keeps_unfinished_jobs(self):
+        """ The vacuum keeps wizards of pending jobs and of partly confirmed ones, with their lines """
+        Wizard = self.env['order.line.excel.import.wizard']
+        wizards = Wizard.create([{
+            'import_file': base64.b64encode(b'-'),
+            'job_state': job_state,
+            'job_step': job_step,
+            'job_offset': job_offset,
+            'line_ids': [(0, 0, {'reference': 'REF'})],
+        } for job_state, job_step, job_offset in [
+            ('queued', 'preview', 0),
+            ('failed', 'confirm', 2000),
+            ('failed', 'validate', 2000),
+            ('done', 'confirm', 4000),
+            (False, False, 0),
+        ]])
+        lines = wizards.line_ids
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE order_line_excel_import_wizard SET write_date = now() - interval '2 days' WHERE id IN %s",
+                            [tuple(wizards.ids)])
+        self.env.cr.execute("UPDATE order_line_excel_import_line SET write_date = now() - interval '2 days' WHERE id IN %s",
+                            [tuple(lines.ids)])
+
+        self.env['order.line.excel.import.line']._transient_vacuum()
+        Wizard._transient_vacuum()
+        self.assertEqual(wizards.exists(), wizards[:2])
+        self.assertEqual(lines.exists(), wizards[:2].line_ids)
@@ -0,0 +1,100 @@
+import codecs
+import csv
+import importlib
+import io
+
+from odoo import _
+from odoo.exceptions import UserError
+
+# Registry of file readers keyed by format.
+# Each reader takes the raw file bytes and yields data rows (header skipped)
+# as sequences of cell values: 0=Ref, 1=Quantity, 2=Price.
+# Parser libraries are imported lazily, only when a reader is actually used.
+READERS = {}
+
+XLS_SIGNATURE = b'\xd0\xcf\x11\xe0'
+XLSX_SIGNATURE = b'PK\x03\x04'
+# Bytes sniffed to tell a text (CSV) file from binary content
+TEXT_SAMPLE_SIZE = 4096
+
+
+def register_reader(file_format):
+    def decorator(func):
+        READERS[file_format] = func
+        return func
+    return decorator
+
+
+def _import(module_name):
+    return importlib.import_module(module_name)
+
+
+@register_reader('xlsx')
+def read_xlsx(file_data):
+    """ Streams rows with openpyxl in read-only mode (rows are not kept in memory). """
+    openpyxl = _import('openpyxl')
+    workbook = openpyxl.load_workbook(io.BytesIO(file_data), read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        for row in sheet.iter_rows(min_row=2, values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+@register_reader('xls')
+def read_xls(file_data):
+    """ Legacy .xls files; xlrd has no streaming API so rows are read one at a time. """
+    xlrd = _import('xlrd')
+    workbook = xlrd.open_workbook(file_contents=file_data, on_demand=True)
+    try:
+        sheet = workbook.sheet_by_index(0)
+        for row_index in range(1, sheet.nrows):
+            yield sheet.row_values(row_index)
+    finally:
+        workbook.release_resources()
+
+
+@register_reader('csv')
+def read_csv(file_data):
+    """ Streams CSV rows, sniffing the delimiter from the header line. """
+    text = io.TextIOWrapper(io.BytesIO(file_data), encoding='utf-8-sig', newline='')
+    try:
+        dialect = csv.Sniffer().sniff(text.readline(), delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    for row in reader:
+        yield row
+
+
+def _is_text(file_data):
+    """ True if the start of the file is UTF-8 text, as CSV files are. """
+    sample = file_data[:TEXT_SAMPLE_SIZE]
+    if b'\x00' in sample:
+        return False
+    try:
+        # Not final: the sample may end in the middle of a character
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_format(file_data, file_name=None):
+    """ Returns the reader key for a file from its content: the signature of
+    the workbook formats, otherwise CSV if the file is text.
+    The extension is not trusted, a renamed file is read by its real format. """
+    if file_data.startswith(XLSX_SIGNATURE):
+        return 'xlsx'
+    if file_data.startswith(XLS_SIGNATURE):
+        return 'xls'
+    if file_data and _is_text(file_data):
+        return 'csv'
+    raise UserError(_("Desteklenmeyen dosya biçimi: %s. Lütfen .xlsx, .xls veya .csv dosyası yükleyin.")
+                    % (file_name or _("adsız dosya")))
+
+
+def iter_rows(file_data, file_name=None):
+    """ Yields the data rows of the first sheet of the file. """
+    return READERS[detect_format(file_data, file_name)](file_data)
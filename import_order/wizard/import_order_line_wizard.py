@@ -1,8 +1,17 @@
 import base64
-import xlrd
+import json
+import logging
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from . import excel_readers
+from ..models.import_order import normalize_reference
+
+_logger = logging.getLogger(__name__)
+
+# Number of rows processed per committed chunk by the background job
+JOB_CHUNK_SIZE = 2000
+
 class ImportOrderLineWizard(models.TransientModel):
     _name = 'order.line.excel.import.wizard'
     _description = 'Excel Import Wizard'
@@ -31,130 +40,561 @@ class ImportOrderLineWizard(models.TransientModel):
         default=lambda self: self.env.context.get('active_id')
     )
 
+    # Compact preview: parsed rows are kept as one packed JSON blob of columns
+    # (see PREVIEW_COLUMNS) instead of one transient record per Excel row.
+    # The page actions (preview, page and filter buttons) store the rows of the
+    # page they open as order.line.excel.import.line records, so the form can
+    # render and edit them, and drop the stored rows of other pages unless
+    # they were edited.
+    preview_mode = fields.Selection([
+        ('records', 'Satır Kayıtları'),
+        ('compact', 'Kompakt')
+    ], string='Önizleme Modu', default='records', required=True)
+    preview_data = fields.Text(string='Preview Data')
+    preview_count = fields.Integer(string='Satır Sayısı', compute='_compute_preview_count')
+
+    page = fields.Integer(string='Sayfa', default=1)
+    page_size = fields.Integer(string='Sayfa Boyutu', default=80)
+    page_count = fields.Integer(string='Sayfa Sayısı', compute='_compute_page_line_ids')
+    page_filter = fields.Selection([
+        ('all', 'Tümü'),
+        ('pending', 'Beklemede'),
+        ('success', 'Başarılı'),
+        ('warning', 'Kontrol'),
+        ('failed', 'Başarısız')
+    ], string='Durum Filtresi', default='all')
+    page_line_ids = fields.One2many(
+        'order.line.excel.import.line', 'wizard_id',
+        string='Preview Lines',
+        compute='_compute_page_line_ids',
+        inverse='_inverse_page_line_ids',
+    )
+
+    # Background job: the cron 'import_order.ir_cron_order_line_excel_import_jobs'
+    # runs the queued steps in chunks and commits after each chunk.
+    purchase_order_id = fields.Many2one('purchase.order', string='Satınalma Siparişi', readonly=True)
+    job_state = fields.Selection([
+        ('queued', 'Sırada'),
+        ('running', 'Çalışıyor'),
+        ('done', 'Tamamlandı'),
+        ('failed', 'Hata')
+    ], string='Arka Plan Durumu', readonly=True)
+    job_step = fields.Selection([
+        ('preview', 'Önizleme'),
+        ('validate', 'Doğrulama'),
+        ('confirm', 'Onay')
+    ], string='Adım', readonly=True)
+    job_offset = fields.Integer(string='İşlenen Satır', readonly=True)
+    job_progress = fields.Float(string='İlerleme', readonly=True)
+    job_message = fields.Text(string='Arka Plan Mesajı', readonly=True)
+
+    PREVIEW_COLUMNS = ('reference', 'quantity', 'excel_price_unit', 'import_price_unit', 'state', 'message', 'match_ids')
+    EDITABLE_COLUMNS = ('reference', 'quantity', 'excel_price_unit')
+
+    @api.depends('preview_mode', 'preview_data', 'line_ids')
+    def _compute_preview_count(self):
+        for wizard in self:
+            if wizard.preview_mode == 'compact':
+                wizard.preview_count = len(wizard._get_preview_columns()['reference'])
+            else:
+                wizard.preview_count = len(wizard.line_ids)
+
+    @api.depends('preview_mode', 'preview_data', 'page', 'page_size', 'page_filter', 'line_ids')
+    def _compute_page_line_ids(self):
+        # Only reads: rows of the page are stored by _load_page()
+        PreviewLine = self.env['order.line.excel.import.line']
+        for wizard in self:
+            wizard_id = wizard._origin.id
+            if wizard.preview_mode != 'compact' or not wizard_id:
+                wizard.page_line_ids = PreviewLine
+                wizard.page_count = 0
+                continue
+            wizard.page_count, row_indexes = wizard._get_page_rows()
+            wizard.page_line_ids = PreviewLine.search(
+                [('wizard_id', '=', wizard_id), ('row_index', 'in', row_indexes)], order='row_index')
+
+    def _inverse_page_line_ids(self):
+        """ Makes the page editable: the One2many commands write the edits on
+        the page's line records themselves, _merge_edited_rows reads them back. """
+
+    def _get_page_rows(self, columns=None):
+        """ Returns (page count, row indexes of the current page) for the status filter. """
+        self.ensure_one()
+        states = (columns or self._get_preview_columns())['state']
+        if self.page_filter and self.page_filter != 'all':
+            row_indexes = [i for i, state in enumerate(states) if state == self.page_filter]
+        else:
+            row_indexes = list(range(len(states)))
+        page_size = max(self.page_size, 1)
+        page_count = max(1, -(-len(row_indexes) // page_size))
+        page = min(max(self.page, 1), page_count)
+        return page_count, row_indexes[(page - 1) * page_size:page * page_size]
+
+    def _load_page(self):
+        """ Stores the rows of the current page as preview line records, and
+        deletes the stored rows of other pages that were not edited. """
+        self.ensure_one()
+        if self.preview_mode != 'compact':
+            return
+        columns = self._get_preview_columns()
+        _page_count, row_indexes = self._get_page_rows(columns)
+        page_rows = set(row_indexes)
+        stale_lines = self.line_ids.filtered(lambda line: line.row_index not in page_rows and not any(
+            (line[name] or False) != (columns[name][line.row_index] or False) for name in self.EDITABLE_COLUMNS))
+        stale_lines.unlink()
+        stored_rows = set(self.line_ids.mapped('row_index'))
+        missing_vals = []
+        for row_index in row_indexes:
+            if row_index not in stored_rows:
+                vals = self._get_preview_row(columns, row_index)
+                vals.update(wizard_id=self.id, match_ids=[(6, 0, vals['match_ids'])])
+                missing_vals.append(vals)
+        self.env['order.line.excel.import.line'].create(missing_vals)
+
+    def _get_preview_columns(self):
+        self.ensure_one()
+        if self.preview_data:
+            return json.loads(self.preview_data)
+        return {name: [] for name in self.PREVIEW_COLUMNS}
+
+    def _set_preview_columns(self, columns):
+        self.ensure_one()
+        self.preview_data = json.dumps(columns, separators=(',', ':'))
+
+    def _get_preview_row(self, columns, row_index):
+        vals = {name: columns[name][row_index] for name in self.PREVIEW_COLUMNS}
+        vals['row_index'] = row_index
+        return vals
+
+    def _merge_edited_rows(self, columns):
+        """ Copies the values of displayed (possibly edited) rows into the packed
+        columns. The stored blob keeps the parsed values so edits can be told apart. """
+        for line in self.line_ids:
+            for name in self.EDITABLE_COLUMNS:
+                columns[name][line.row_index] = line[name]
+        return columns
+
+    def action_next_page(self):
+        self.ensure_one()
+        self.page = min(self.page + 1, self.page_count)
+        self._load_page()
+        return self._reopen_wizard()
+
+    def action_previous_page(self):
+        self.ensure_one()
+        self.page = max(self.page - 1, 1)
+        self._load_page()
+        return self._reopen_wizard()
+
+    def action_set_page_filter(self):
+        """ Shows the first page of the status given by the 'page_filter' context key. """
+        self.ensure_one()
+        self.write({'page_filter': self.env.context.get('page_filter') or 'all', 'page': 1})
+        self._load_page()
+        return self._reopen_wizard()
 
     def action_preview(self):
         self.ensure_one()
+        self._check_no_job()
+        self._clear_failed_job()
         if not self.import_file:
             raise UserError(_("Lütfen bir Excel dosyası yükleyin."))
 
         try:
             file_data = base64.b64decode(self.import_file)
-            workbook = xlrd.open_workbook(file_contents=file_data)
-            sheet = workbook.sheet_by_index(0)
+            if self.preview_mode == 'compact':
+                columns = self._parse_columns(file_data)
+            else:
+                preview_vals = [(0, 0, vals) for vals in self._iter_preview_vals(file_data)]
+        except UserError:
+            raise
         except Exception as e:
             raise UserError(_("Excel dosyası okunamadı. Hata: %s") % str(e))
 
-        preview_vals = []
-        for row_index in range(sheet.nrows):
-            if row_index == 0: continue
-            ref_val, qty_val, price_val, status, message = self._parse_excel_row(sheet, row_index)
-            preview_vals.append((0, 0, {
+        if self.preview_mode == 'compact':
+            self.write({'line_ids': [(5, 0, 0)], 'state': 'draft', 'page': 1})
+            self._set_preview_columns(columns)
+            self._load_page()
+        else:
+            self.write({
+                'line_ids': [(5, 0, 0)] + preview_vals,
+                'state': 'draft'
+            })
+        
+        return self._reopen_wizard()
+
+    def _parse_columns(self, file_data):
+        columns = {name: [] for name in self.PREVIEW_COLUMNS}
+        for vals in self._iter_preview_vals(file_data):
+            for name in self.PREVIEW_COLUMNS:
+                columns[name].append(vals[name])
+        return columns
+
+    def _iter_preview_vals(self, file_data):
+        """ Yields one dict of preview values per data row of the file. """
+        for row in excel_readers.iter_rows(file_data, self.file_name):
+            ref_val, qty_val, price_val, status, message = self._parse_excel_row(row)
+            yield {
                 'reference': ref_val,
                 'quantity': qty_val,
                 'excel_price_unit': price_val,
+                'import_price_unit': 0.0,
                 'state': 'pending' if status == 'pending' else 'failed',
-                'message': message
-            }))
-        
-        self.write({
-            'line_ids': [(5, 0, 0)] + preview_vals,
-            'state': 'draft'
-        })
-        
-        return self._reopen_wizard()
+                'message': message,
+                'match_ids': [],
+            }
 
-    def _parse_excel_row(self, sheet, row_index):
+    def _parse_excel_row(self, row):
+        """ Parses a row yielded by the file readers (0=Ref, 1=Quantity, 2=Price). """
         try:
-            ref = str(sheet.cell_value(row_index, 0)).strip()
-            qty = float(sheet.cell_value(row_index, 1) or 0.0)
-            price = float(sheet.cell_value(row_index, 2) or 0.0)
+            cells = list(row[:3]) + [None] * (3 - len(row[:3]))
+            ref_cell, qty_cell, price_cell = cells
+            ref = str(ref_cell).strip() if ref_cell is not None else ''
+            qty = float(qty_cell or 0.0)
+            price = float(price_cell or 0.0)
             return ref, qty, price, 'pending', ''
         except Exception as e:
             return '', 0.0, 0.0, 'failed', str(e)
 
     def action_validate(self):
         self.ensure_one()
+        self._check_no_job()
+        self._clear_failed_job()
+        if self.preview_mode == 'compact':
+            self._validate_compact()
+            self.write({'state': 'validated'})
+            self._load_page()
+            return self._reopen_wizard()
+
+        # Group preview lines by Reference so repeated references are matched once
+        grouped_ids = {}
         for line in self.line_ids:
-            target_lines = self.env['x_import_order_line'].search([('x_teknik_referans', '=', line.reference)])
-            if target_lines:
-                odoo_price = target_lines[0].price_unit
-                line.write({
-                    'match_ids': [(6, 0, target_lines.ids)],
-                    'import_price_unit': odoo_price,
-                    'state': 'success' if abs(odoo_price - line.excel_price_unit) < 0.01 else 'warning',
-                    'message': _('Eşleşme bulundu.') if abs(odoo_price - line.excel_price_unit) < 0.01 else _('Fiyat farkı var.')
-                })
-            else:
-                line.write({'state': 'failed', 'message': _('Referans bulunamadı.')})
+            grouped_ids.setdefault(line.reference, []).append(line.id)
+        grouped_lines = {
+            ref: self.env['order.line.excel.import.line'].browse(ids)
+            for ref, ids in grouped_ids.items()
+        }
+
+        matches_map = self._match_references(grouped_lines.keys())
+
+        # Collect line ids per identical result so each outcome is written once
+        write_groups = {}
+        for ref, lines in grouped_lines.items():
+            target_lines = matches_map.get(ref)
+            for line in lines:
+                key = self._get_match_result(target_lines, line.excel_price_unit)
+                write_groups.setdefault(key, []).append(line.id)
+
+        PreviewLine = self.env['order.line.excel.import.line']
+        for key, line_ids in write_groups.items():
+            PreviewLine.browse(line_ids).write(self._get_match_result_vals(*key))
 
         self.write({'state': 'validated'})
         return self._reopen_wizard()
 
+    def _validate_compact(self, start=0, stop=None):
+        """ Matches the packed preview columns (rows start:stop), then mirrors
+        the results on the displayed rows. """
+        columns = self._get_preview_columns()
+        edited_columns = self._merge_edited_rows(self._get_preview_columns())
+        stop = len(columns['reference']) if stop is None else min(stop, len(columns['reference']))
+        matches_map = self._match_references(edited_columns['reference'][start:stop])
+
+        for row_index in range(start, stop):
+            ref = edited_columns['reference'][row_index]
+            key = self._get_match_result(matches_map.get(ref), edited_columns['excel_price_unit'][row_index])
+            vals = self._get_match_result_vals(*key)
+            columns['match_ids'][row_index] = list(key[0])
+            columns['import_price_unit'][row_index] = vals.get('import_price_unit', 0.0)
+            columns['state'][row_index] = vals['state']
+            columns['message'][row_index] = vals['message']
+
+        write_groups = {}
+        for line in self.line_ids.filtered(lambda l: start <= l.row_index < stop):
+            row_index = line.row_index
+            key = (tuple(columns['match_ids'][row_index]), columns['import_price_unit'][row_index],
+                   columns['state'][row_index])
+            write_groups.setdefault(key, []).append(line.id)
+        PreviewLine = self.env['order.line.excel.import.line']
+        for key, line_ids in write_groups.items():
+            PreviewLine.browse(line_ids).write(self._get_match_result_vals(*key))
+
+        self._set_preview_columns(columns)
+
+    def _get_match_result(self, target_lines, excel_price):
+        """ Returns the hashable match outcome (match_ids, odoo_price, state) of a row. """
+        if not target_lines:
+            return (), 0.0, 'failed'
+        odoo_price = target_lines[0].price_unit
+        state = 'success' if abs(odoo_price - excel_price) < 0.01 else 'warning'
+        return tuple(target_lines.ids), odoo_price, state
+
+    def _get_match_result_vals(self, match_ids, odoo_price, state):
+        if state == 'failed':
+            return {'state': 'failed', 'message': _('Referans bulunamadı.')}
+        return {
+            'match_ids': [(6, 0, list(match_ids))],
+            'import_price_unit': odoo_price,
+            'state': state,
+            'message': _('Eşleşme bulundu.') if state == 'success' else _('Fiyat farkı var.')
+        }
+
+    def _match_references(self, references):
+        """ Resolves all references with a single query on the normalized key
+        (see normalize_reference), so formatting differences still match.
+        Returns a dict: reference -> x_import_order_line recordset (ordered by id). """
+        keys_by_ref = {ref: normalize_reference(ref) for ref in set(references) if ref}
+        keys = list({key for key in keys_by_ref.values() if key})
+        if not keys:
+            return {}
+        target_lines = self.env['x_import_order_line'].search(
+            [('x_reference_key', 'in', keys)], order='id asc'
+        )
+        ids_map = {}
+        for target in target_lines:
+            ids_map.setdefault(target.x_reference_key, []).append(target.id)
+        return {
+            ref: self.env['x_import_order_line'].browse(ids_map[key])
+            for ref, key in keys_by_ref.items() if key in ids_map
+        }
+
     def action_confirm(self):
         self.ensure_one()
+        self._check_no_job()
         
         if not self.partner_id:
             raise UserError(_("Lütfen devam etmeden önce bir Tedarikçi seçin."))
         
-        # 1. Filter valid lines
-        valid_lines = self.line_ids.filtered(lambda l: l.state in ['success', 'warning'])
-        if not valid_lines:
+        # 1. Collect valid rows as (quantity, excel price, matched line ids)
+        # valid rows ALWAYS have match_ids ('failed' rows have no match).
+        valid_rows = [row for row in self._get_valid_rows() if row[2]]
+        if not valid_rows:
             return {'type': 'ir.actions.act_window_close'}
 
-        # 2. Create Purchase Order
+        # 2. Create Purchase Order and its lines
+        purchase_order = self._create_purchase_order()
+        self._confirm_rows(purchase_order, valid_rows)
+
+        self.write({'state': 'done'})
+        return self._open_purchase_order()
+
+    def _create_purchase_order(self):
         purchase_order = self.env['purchase.order'].create({
             'partner_id': self.partner_id.id,
             'date_order': fields.Date.today(),
             'company_id': self.env.company.id,
             'origin': self.import_order_id.name or _('Excel Import: %s') % self.file_name,
         })
-        
-        PurchaseOrderLine = self.env['purchase.order.line']
-
-        for line in valid_lines:
-            # 3. Update existing match if exists
-            if line.match_ids:
-                line.match_ids.write({'x_qty_incoming': line.quantity})
-                
-                # Get the technical reference ID from match_ids (taking the first one)
-                import_line_id = line.match_ids[0].id
-            else:
-                import_line_id = False
-
-            # 4. Create PO Line
-            # We assume the product info comes from match_ids or needs to be found. 
-            # In the wizard logic, we matched lines. 
-            # If no match_ids but valid (e.g. forced), we might fail if we don't have product_id.
-            # But the logic says 'warning' lines have a match but price diff. 'success' have match.
-            # 'failed' have no match. So valid_lines ALWAYS have match_ids.
-            
-            if line.match_ids:
-                matched_line = line.match_ids[0]
-                PurchaseOrderLine.create({
-                    'order_id': purchase_order.id,
-                    'product_id': matched_line.product_id.id,
-                    'name': matched_line.product_id.name, # Required field
-                    'product_qty': line.quantity,
-                    'price_unit': line.excel_price_unit, # Use Excel price
-                    'date_planned': fields.Date.today(),
-                    'product_uom': matched_line.product_id.uom_po_id.id,
-                    'import_order_line_id': matched_line.id,
-                })
+        self.purchase_order_id = purchase_order
+        return purchase_order
 
-        self.write({'state': 'done'})
+    def _confirm_rows(self, purchase_order, valid_rows):
+        """ Creates the PO lines of valid_rows and updates the matched import lines. """
+        # 1. Prefetch matched lines, products and UoMs in a few queries
+        ImportOrderLine = self.env['x_import_order_line']
+        matched_lines = ImportOrderLine.browse({match_id for row in valid_rows for match_id in row[2]})
+        products = matched_lines.mapped('product_id')
+        products.read(['name', 'uom_po_id'])
+
+        incoming_map = {}  # x_import_order_line id -> x_qty_incoming (last Excel row wins)
+        po_line_vals = []
+        date_planned = fields.Date.today()
+        for quantity, excel_price_unit, match_ids in valid_rows:
+            for match_id in match_ids:
+                incoming_map[match_id] = quantity
+
+            matched_line = ImportOrderLine.browse(match_ids[0])
+            product = matched_line.product_id
+            po_line_vals.append({
+                'order_id': purchase_order.id,
+                'product_id': product.id,
+                'name': product.name, # Required field
+                'product_qty': quantity,
+                'price_unit': excel_price_unit, # Use Excel price
+                'date_planned': date_planned,
+                'product_uom': product.uom_po_id.id,
+                'import_order_line_id': matched_line.id,
+            })
+
+        # 2. Update existing matches, one write per distinct incoming quantity
+        lines_by_qty = {}
+        for match_id, qty in incoming_map.items():
+            lines_by_qty.setdefault(qty, []).append(match_id)
+        for qty, match_ids in lines_by_qty.items():
+            ImportOrderLine.browse(match_ids).write({'x_qty_incoming': qty})
+
+        # 3. Create all PO lines at once (amounts are recomputed once)
+        if po_line_vals:
+            self.env['purchase.order.line'].create(po_line_vals)
+
+    def _open_purchase_order(self):
         return {
             'name': _('Satınalma Siparişi'),
             'type': 'ir.actions.act_window',
             'res_model': 'purchase.order',
-            'res_id': purchase_order.id,
+            'res_id': self.purchase_order_id.id,
             'view_mode': 'form',
             'target': 'current',
         }
 
+    def action_open_purchase_order(self):
+        self.ensure_one()
+        return self._open_purchase_order()
+
+    def _get_valid_rows(self):
+        """ Returns the rows to confirm as (quantity, excel_price_unit, match_ids) tuples. """
+        self.ensure_one()
+        if self.preview_mode == 'compact':
+            columns = self._merge_edited_rows(self._get_preview_columns())
+            return [
+                (columns['quantity'][i], columns['excel_price_unit'][i], columns['match_ids'][i])
+                for i, state in enumerate(columns['state']) if state in ['success', 'warning']
+            ]
+        valid_lines = self.line_ids.filtered(lambda l: l.state in ['success', 'warning'])
+        return [(line.quantity, line.excel_price_unit, line.match_ids.ids) for line in valid_lines]
+
+    def _has_unfinished_job(self):
+        """ True while a job is queued or running, or when a failed confirm job
+        already added lines to purchase_order_id: such a job must be resumed,
+        not restarted, or its committed chunks are duplicated. """
+        self.ensure_one()
+        return self.job_state in ('queued', 'running') or (
+            self.job_state == 'failed' and self.job_step == 'confirm'
+            and bool(self.job_offset or self.purchase_order_id))
+
+    def _check_no_job(self):
+        for wizard in self:
+            if wizard._has_unfinished_job():
+                raise UserError(_("Bu dosyanın satınalma siparişi arka planda oluşturuluyor veya yarıda kaldı. "
+                                  "Lütfen arka plan işini kaldığı yerden devam ettirin."))
+
+    def _clear_failed_job(self):
+        """ A failed preview or validation job is replaced by the step run by hand. """
+        self.filtered(lambda w: w.job_state == 'failed').write({'job_state': False, 'job_message': False})
+
     def action_reset(self):
-        self.write({'state': 'draft', 'line_ids': [(5, 0, 0)]})
+        self._check_no_job()
+        self.write({
+            'state': 'draft',
+            'line_ids': [(5, 0, 0)],
+            'preview_data': False,
+            'page': 1,
+            'job_state': False,
+            'job_step': False,
+            'job_offset': 0,
+            'job_progress': 0.0,
+            'job_message': False,
+        })
+        return self._reopen_wizard()
+
+    # ------------------------------------------------------------------
+    # Background job mode
+    # ------------------------------------------------------------------
+
+    def action_preview_async(self):
+        """ Queues preview and validation of the file for the background job. """
+        self.ensure_one()
+        self._check_no_job()
+        if not self.import_file:
+            raise UserError(_("Lütfen bir Excel dosyası yükleyin."))
+        self.write({'preview_mode': 'compact', 'line_ids': [(5, 0, 0)], 'preview_data': False, 'page': 1})
+        return self._enqueue_job('preview')
+
+    def action_confirm_async(self):
+        """ Queues creation of the purchase order for the background job. """
+        self.ensure_one()
+        self._check_no_job()
+        if not self.partner_id:
+            raise UserError(_("Lütfen devam etmeden önce bir Tedarikçi seçin."))
+        return self._enqueue_job('confirm')
+
+    def action_resume_job(self):
+        """ Re-queues a failed job; it continues after its last committed chunk. """
+        self.ensure_one()
+        if self.job_state != 'failed':
+            raise UserError(_("Bu dosya için hata almış bir arka plan adımı yok."))
+        return self._enqueue_job(self.job_step, resume=True)
+
+    def action_refresh(self):
+        self.ensure_one()
+        self._load_page()
         return self._reopen_wizard()
 
+    def _enqueue_job(self, step, resume=False):
+        vals = {
+            'job_state': 'queued',
+            'job_step': step,
+            'job_message': False,
+        }
+        if not resume:
+            vals.update({'job_offset': 0, 'job_progress': 0.0})
+        self.write(vals)
+        self.env.ref('import_order.ir_cron_order_line_excel_import_jobs')._trigger()
+        return self._reopen_wizard()
+
+    @api.autovacuum
+    def _transient_vacuum(self):
+        # Deletions made by the vacuum are filtered in unlink(): wizards of
+        # unfinished jobs keep their preview data and purchase order link
+        return super(ImportOrderLineWizard, self.with_context(transient_vacuum=True))._transient_vacuum()
+
+    def unlink(self):
+        wizards = self
+        if self.env.context.get('transient_vacuum'):
+            wizards = self.filtered(lambda w: not w._has_unfinished_job())
+        return super(ImportOrderLineWizard, wizards).unlink()
+
+    @api.model
+    def _cron_process_jobs(self):
+        wizards = self.search([('job_state', 'in', ['queued', 'running'])], order='id')
+        for wizard in wizards:
+            wizard.with_user(wizard.create_uid)._run_job()
+
+    def _run_job(self):
+        """ Runs the queued step chunk by chunk, committing after each chunk so
+        progress survives and is visible while the job is running. """
+        self.ensure_one()
+        try:
+            while self.job_state in ('queued', 'running'):
+                self._run_job_chunk()
+                self.env.cr.commit()
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.exception("Excel import job failed for wizard %s", self.id)
+            self.write({'job_state': 'failed', 'job_message': str(e)})
+            self.env.cr.commit()
+
+    def _run_job_chunk(self):
+        self.job_state = 'running'
+        if self.job_step == 'preview':
+            file_data = base64.b64decode(self.import_file)
+            self._set_preview_columns(self._parse_columns(file_data))
+            self.write({'state': 'draft', 'job_step': 'validate', 'job_offset': 0})
+            return
+
+        if self.job_step == 'validate':
+            total = self.preview_count
+            stop = self.job_offset + JOB_CHUNK_SIZE
+            self._validate_compact(self.job_offset, stop)
+            if stop >= total:
+                self.write({'state': 'validated', 'job_state': 'done', 'job_offset': total, 'job_progress': 100.0})
+                self._load_page()
+            else:
+                self.write({'job_offset': stop, 'job_progress': 100.0 * stop / total})
+            return
+
+        if self.job_step == 'confirm':
+            valid_rows = [row for row in self._get_valid_rows() if row[2]]
+            purchase_order = self.purchase_order_id
+            if valid_rows and not purchase_order:
+                purchase_order = self._create_purchase_order()
+            stop = self.job_offset + JOB_CHUNK_SIZE
+            self._confirm_rows(purchase_order, valid_rows[self.job_offset:stop])
+            if stop >= len(valid_rows):
+                self.write({'state': 'done', 'job_state': 'done', 'job_offset': len(valid_rows), 'job_progress': 100.0})
+            else:
+                self.write({'job_offset': stop, 'job_progress': 100.0 * stop / len(valid_rows)})
+
     def _reopen_wizard(self):
         return {
             'name': _('Excel ile Aktar'),
@@ -171,6 +611,7 @@ class ImportOrderLineWizardLine(models.TransientModel):
     _description = 'Excel Import Wizard Preview Line'
 
     wizard_id = fields.Many2one('order.line.excel.import.wizard', string='Wizard', ondelete='cascade')
+    row_index = fields.Integer(string='Satır No', help="Position of the row in the compact preview data.")
     reference = fields.Char(string='Referans')
     quantity = fields.Float(string='Miktar')
     import_price_unit = fields.Float(string='Import Birim Fiyat')
@@ -184,3 +625,15 @@ class ImportOrderLineWizardLine(models.TransientModel):
         ('failed', 'Başarısız')
     ], string='Durum', default='pending')
     message = fields.Char(string='Mesaj')
+
+    @api.autovacuum
+    def _transient_vacuum(self):
+        # Edited rows of a compact preview are read again by a resumed job
+        return super(ImportOrderLineWizardLine, self.with_context(transient_vacuum=True))._transient_vacuum()
+
+    def unlink(self):
+        lines = self
+        if self.env.context.get('transient_vacuum'):
+            unfinished = self.wizard_id.filtered(lambda w: w._has_unfinished_job())
+            lines = self.filtered(lambda l: l.wizard_id not in unfinished)
+        return super(ImportOrderLineWizardLine, lines).unlink()
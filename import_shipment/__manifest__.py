@@ -15,11 +15,14 @@
     'depends': ['purchase', 'stock', 'mrp', 'purchase_stock', 'product'],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'wizard/import_shipment_excel_wizard_views.xml',
         'views/import_shipment_views.xml',
         'views/stock_picking_type_views.xml',
         'models/product_product_views.xml',
         'views/stock_move_views.xml',
+        'views/purchase_order_views.xml',
+        'views/import_shipment_parse_cache_views.xml',
     ],
     'installable': True,
     'application': True,
@@ -1,4 +1,6 @@
 from . import import_shipment
+from . import import_shipment_supply
+from . import import_shipment_parse_cache
 from . import purchase_order
 from . import stock_warehouse_orderpoint
 from . import product_product
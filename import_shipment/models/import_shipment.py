@@ -2,8 +2,13 @@ from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
 
+from psycopg2.extras import execute_values
+
 _logger = logging.getLogger(__name__)
 
+# Stored fields that change the contribution of a shipment to import.shipment.supply
+SUPPLY_FIELDS = {'open_qty', 'state', 'active', 'product_id', 'location_dest_id', 'company_id'}
+
 class ImportShipment(models.Model):
     _name = 'import.shipment'
     _description = 'Import Shipment Line'
@@ -31,6 +36,10 @@ class ImportShipment(models.Model):
     
     price_unit = fields.Float(related='purchase_line_id.price_unit', string='Unit Price', store=True, readonly=True)
     currency_id = fields.Many2one('res.currency', related='purchase_order_id.currency_id', string='Currency', store=True, readonly=True)
+    company_id = fields.Many2one('res.company', related='purchase_order_id.company_id', string='Company', store=True, readonly=True, index=True)
+    # Denormalized destination, follows the PO picking type (and its default destination)
+    location_dest_id = fields.Many2one('stock.location', related='purchase_order_id.picking_type_id.default_location_dest_id',
+                                       string='Destination Location', store=True, readonly=True, index=True)
     
     ordered_qty = fields.Float(string='Ordered Qty', related='purchase_line_id.product_qty', store=True, readonly=True)
     imported_qty = fields.Float(string='Imported Qty', help="Cumulative quantity imported via Excel", copy=False, default=0.0)
@@ -67,20 +76,107 @@ class ImportShipment(models.Model):
 
     @api.depends('move_ids.state', 'move_ids.quantity_done')
     def _compute_received_qty(self):
+        # Sum quantity_done for all linked moves that are done, one grouped query
+        groups = self.env['stock.move']._read_group(
+            [('import_shipment_id', 'in', self._origin.ids), ('state', '=', 'done')],
+            ['import_shipment_id', 'quantity_done:sum'],
+            ['import_shipment_id'],
+        ) if self._origin else []
+        received = {group['import_shipment_id'][0]: group['quantity_done'] for group in groups}
         for record in self:
-            # Sum quantity_done for all linked moves that are done
-            record.received_qty = sum(move.quantity_done for move in record.move_ids if move.state == 'done')
+            record.received_qty = received.get(record._origin.id, 0.0)
 
     @api.depends('move_ids.picking_id')
     def _compute_picking_count(self):
+        groups = self.env['stock.move']._read_group(
+            [('import_shipment_id', 'in', self._origin.ids), ('picking_id', '!=', False)],
+            ['import_shipment_id', 'picking_id:count_distinct'],
+            ['import_shipment_id'],
+        ) if self._origin else []
+        counts = {group['import_shipment_id'][0]: group['picking_id'] for group in groups}
         for record in self:
-            record.picking_count = len(record.move_ids.mapped('picking_id'))
+            record.picking_count = counts.get(record._origin.id, 0)
 
     @api.depends('ordered_qty', 'imported_qty')
     def _compute_open_qty(self):
         for record in self:
             record.open_qty = max(0, record.ordered_qty - record.imported_qty)
 
+    def _lock_for_allocation(self, lock_timeout='10s'):
+        """ Locks the shipment rows in id order (deterministic, so concurrent
+        importers cannot deadlock each other) and drops cached quantities. """
+        if not self:
+            return
+        self.flush_recordset(['imported_qty'])
+        # The timeout only applies to this statement: the previous value is put
+        # back once the locks are held. If locking fails, rolling back to the
+        # caller's savepoint restores it as well.
+        self.env.cr.execute("SHOW lock_timeout")
+        previous_lock_timeout = self.env.cr.fetchone()[0]
+        self.env.cr.execute("SELECT set_config('lock_timeout', %s, true)", [lock_timeout])
+        self.env.cr.execute(
+            "SELECT id FROM import_shipment WHERE id IN %s ORDER BY id FOR UPDATE",
+            [tuple(self.ids)]
+        )
+        self.env.cr.execute("SELECT set_config('lock_timeout', %s, true)", [previous_lock_timeout])
+        self.invalidate_recordset(['imported_qty', 'ordered_qty', 'expected_date'])
+
+    @api.model
+    def _increment_imported_qty(self, allocations):
+        """ Adds allocations (shipment_id -> qty) to imported_qty with one atomic
+        UPDATE, so the increment never relies on a value read in Python.
+        Dependent fields (open_qty, state) are recomputed by the ORM. """
+        if not allocations:
+            return self.browse()
+        self.flush_model(['imported_qty'])
+        rows = sorted(allocations.items())
+        execute_values(self.env.cr._obj, """
+            UPDATE import_shipment shipment
+               SET imported_qty = COALESCE(shipment.imported_qty, 0.0) + data.qty
+              FROM (VALUES %s) AS data(id, qty)
+             WHERE shipment.id = data.id
+        """, rows)
+        shipments = self.browse([shipment_id for shipment_id, _qty in rows])
+        shipments.invalidate_recordset(['imported_qty'])
+        shipments.modified(['imported_qty'])
+        return shipments
+
+    @api.model
+    def _decrement_imported_qty(self, quantities):
+        """ Subtracts quantities (shipment_id -> qty) from imported_qty, never
+        going below zero, with one atomic UPDATE (see _increment_imported_qty). """
+        if not quantities:
+            return self.browse()
+        self.flush_model(['imported_qty'])
+        rows = sorted(quantities.items())
+        execute_values(self.env.cr._obj, """
+            UPDATE import_shipment shipment
+               SET imported_qty = GREATEST(COALESCE(shipment.imported_qty, 0.0) - data.qty, 0.0)
+              FROM (VALUES %s) AS data(id, qty)
+             WHERE shipment.id = data.id
+        """, rows)
+        shipments = self.browse([shipment_id for shipment_id, _qty in rows])
+        shipments.invalidate_recordset(['imported_qty'])
+        shipments.modified(['imported_qty'])
+        return shipments
+
+    def _write(self, vals):
+        # Keep the open supply ledger in sync with stored changes, including
+        # the recomputed open_qty/state values flushed by the ORM.
+        if not SUPPLY_FIELDS.intersection(vals):
+            return super(ImportShipment, self)._write(vals)
+        Supply = self.env['import.shipment.supply']
+        before = Supply._get_contributions(self.ids)
+        res = super(ImportShipment, self)._write(vals)
+        Supply._apply_deltas(before, Supply._get_contributions(self.ids))
+        return res
+
+    def unlink(self):
+        self.flush_recordset()
+        Supply = self.env['import.shipment.supply']
+        Supply._apply_deltas(Supply._get_contributions(self.ids), {})
+        return super(ImportShipment, self).unlink()
+
     def create_incoming_picking(self, batch_qty=0.0, excel_date=False, picking_type_id=False):
         """
         Creates a single incoming picking for selected import shipment lines.
@@ -97,7 +193,7 @@ class ImportShipment(models.Model):
             items_qty_map = {l.id: (batch_qty or (l.imported_qty - l.received_qty)) for l in lines_to_process}
 
         # Filter lines where qty > 0
-        valid_line_ids = [l_id for l_id, qty in items_qty_map.items() if qty > 0]
+        valid_line_ids = {l_id for l_id, qty in items_qty_map.items() if qty > 0}
         lines_to_process = self.filtered(lambda l: l.id in valid_line_ids)
 
         if not lines_to_process:
@@ -105,7 +201,7 @@ class ImportShipment(models.Model):
 
         # Group by partner and picking type (warehouse)
         # Key: (partner, picking_type)
-        grouped_lines = {}
+        grouped_ids = {}
         for line in lines_to_process:
             # Fallback to first purchase order's picking type if not apparent (though PO relation is required)
             po = line.purchase_order_id
@@ -116,18 +212,19 @@ class ImportShipment(models.Model):
             if not pt:
                 continue
             
-            key = (line.partner_id, pt)
-            if key not in grouped_lines:
-                grouped_lines[key] = self.env['import.shipment']
-            grouped_lines[key] |= line
-            
-        pickings = self.env['stock.picking']
-        
-        for (partner, picking_type), partner_lines in grouped_lines.items():
-            # Determine scheduled date: min of all move dates
+            grouped_ids.setdefault((line.partner_id, pt), []).append(line.id)
+
+        if not grouped_ids:
+            return self.env['stock.picking']
+
+        # 1. All picking values, scheduled date = min of the group's move dates
+        groups = []
+        picking_vals_list = []
+        for (partner, picking_type), line_ids in grouped_ids.items():
+            partner_lines = self.browse(line_ids)
             final_excel_date = excel_date
             if not final_excel_date and move_dates_map:
-                dates = [d for l_id, d in move_dates_map.items() if l_id in partner_lines.ids and d]
+                dates = [move_dates_map[l_id] for l_id in line_ids if move_dates_map.get(l_id)]
                 if dates:
                     final_excel_date = min(dates)
 
@@ -142,18 +239,21 @@ class ImportShipment(models.Model):
             }
             if final_excel_date:
                 picking_vals['scheduled_date'] = final_excel_date
-            
-            picking = self.env['stock.picking'].create(picking_vals)
-            
-            moves_to_create = []
+            groups.append(partner_lines)
+            picking_vals_list.append(picking_vals)
+
+        pickings = self.env['stock.picking'].create(picking_vals_list)
+
+        # 2. All move values of all pickings (every line has a positive quantity)
+        moves_to_create = []
+        lines_by_picking = {}
+        now = fields.Datetime.now()
+        for picking, partner_lines in zip(pickings, groups):
             for line in partner_lines:
-                qty_to_process = items_qty_map.get(line.id, 0.0)
-                if qty_to_process <= 0:
-                    continue
-                
-                move_date = move_dates_map.get(line.id) or excel_date or fields.Datetime.now()
+                qty_to_process = items_qty_map[line.id]
+                move_date = move_dates_map.get(line.id) or excel_date or now
 
-                move_vals = {
+                moves_to_create.append({
                     'name': line.product_id.name,
                     'product_id': line.product_id.id,
                     'product_uom_qty': qty_to_process,
@@ -167,14 +267,14 @@ class ImportShipment(models.Model):
                     'date': move_date,
                     'company_id': picking.company_id.id,
                     'x_purchase_order_names': line.purchase_order_id.name,
-                }
-                moves_to_create.append(move_vals)
-            
-            if moves_to_create:
-                self.env['stock.move'].create(moves_to_create)
-                picking.action_confirm()
-                partner_lines.write({'picking_id': picking.id})
-                pickings |= picking
+                })
+                lines_by_picking.setdefault(picking.id, []).append(line.id)
+
+        # 3. One multi-create and one confirmation for everything
+        self.env['stock.move'].create(moves_to_create)
+        pickings.action_confirm()
+        for picking_id, line_ids in lines_by_picking.items():
+            self.browse(line_ids).write({'picking_id': picking_id})
 
         return pickings
 
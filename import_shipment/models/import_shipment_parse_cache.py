@@ -0,0 +1,107 @@
+import json
+
+from odoo import models, fields, api
+
+# Defaults of the eviction limits (overridable with system parameters)
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024  # bytes of cached rows
+DEFAULT_MAX_AGE_DAYS = 7
+
+
+class ImportShipmentParseCache(models.Model):
+    """ Parsed rows of uploaded shipment Excel files, keyed by the file's SHA-256
+    and the parser version, so identical re-uploads skip the Excel parse.
+    Least recently used payloads are cleared when the cache exceeds its size
+    limit; entries not used within the age limit are deleted. """
+    _name = 'import.shipment.parse.cache'
+    _description = 'Import Shipment Excel Parse Cache'
+    _rec_name = 'checksum'
+    _order = 'last_used desc, id desc'
+
+    checksum = fields.Char(string='SHA-256', required=True, readonly=True)
+    parser_version = fields.Char(string='Parser Version', required=True, readonly=True)
+    rows = fields.Text(string='Parsed Rows', readonly=True)
+    row_count = fields.Integer(string='Rows', readonly=True)
+    size = fields.Integer(string='Size (Bytes)', readonly=True)
+    last_used = fields.Datetime(string='Last Used', readonly=True, index=True)
+    hit_count = fields.Integer(string='Hits', readonly=True)
+    miss_count = fields.Integer(string='Misses', readonly=True)
+
+    _sql_constraints = [
+        ('checksum_version_uniq', 'unique(checksum, parser_version)',
+         'Only one cache entry per file and parser version is allowed.'),
+    ]
+
+    @api.model
+    def _get_limits(self):
+        """ Returns (max size in bytes, max age in days). """
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        return (
+            int(get_param('import_shipment.parse_cache_max_size', DEFAULT_MAX_SIZE)),
+            int(get_param('import_shipment.parse_cache_max_age_days', DEFAULT_MAX_AGE_DAYS)),
+        )
+
+    @api.model
+    def _lookup(self, checksum, parser_version):
+        """ Returns the cached rows of a file, or None. A hit is counted in the same statement. """
+        self.flush_model()
+        self.env.cr.execute("""
+            UPDATE import_shipment_parse_cache
+               SET hit_count = hit_count + 1, last_used = now() at time zone 'UTC'
+             WHERE checksum = %s AND parser_version = %s AND rows IS NOT NULL
+         RETURNING rows
+        """, [checksum, parser_version])
+        row = self.env.cr.fetchone()
+        self.invalidate_model(['hit_count', 'last_used'])
+        return json.loads(row[0]) if row else None
+
+    @api.model
+    def _store(self, checksum, parser_version, rows):
+        """ Caches the parsed rows of a file (counted as a miss) and applies the eviction limits.
+        rows must be JSON serializable. """
+        payload = json.dumps(rows, separators=(',', ':'))
+        self.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO import_shipment_parse_cache
+                   (checksum, parser_version, rows, row_count, size, last_used, hit_count, miss_count,
+                    create_uid, create_date, write_uid, write_date)
+            VALUES (%(checksum)s, %(version)s, %(rows)s, %(row_count)s, %(size)s, now() at time zone 'UTC', 0, 1,
+                    %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC')
+            ON CONFLICT (checksum, parser_version)
+            DO UPDATE SET rows = EXCLUDED.rows,
+                          row_count = EXCLUDED.row_count,
+                          size = EXCLUDED.size,
+                          last_used = EXCLUDED.last_used,
+                          miss_count = import_shipment_parse_cache.miss_count + 1,
+                          write_uid = EXCLUDED.write_uid,
+                          write_date = EXCLUDED.write_date
+        """, {
+            'checksum': checksum,
+            'version': parser_version,
+            'rows': payload,
+            'row_count': len(rows),
+            'size': len(payload.encode()),
+            'uid': self.env.uid,
+        })
+        self._evict()
+        self.invalidate_model()
+
+    @api.model
+    def _evict(self):
+        """ Deletes entries older than the age limit, then clears the least recently
+        used payloads beyond the size limit. Cleared entries keep their counters. """
+        max_size, max_age_days = self._get_limits()
+        self.env.cr.execute("""
+            DELETE FROM import_shipment_parse_cache
+             WHERE last_used < (now() at time zone 'UTC') - %s * interval '1 day'
+        """, [max_age_days])
+        self.env.cr.execute("""
+            UPDATE import_shipment_parse_cache
+               SET rows = NULL, size = 0
+             WHERE id IN (
+                SELECT id
+                  FROM (SELECT id, SUM(size) OVER (ORDER BY last_used DESC, id DESC) AS total_size
+                          FROM import_shipment_parse_cache
+                         WHERE rows IS NOT NULL) AS ranked
+                 WHERE total_size > %s)
+        """, [max_size])
+        self.invalidate_model()
@@ -0,0 +1,149 @@
+from psycopg2.extras import execute_values
+
+from odoo import models, fields, api
+
+# Shipment states whose open_qty is still expected to arrive
+OPEN_STATES = ('waiting', 'partially_imported', 'imported')
+
+
+class ImportShipmentSupply(models.Model):
+    """ Ledger of open import shipment quantity per product, destination location and company.
+    Maintained incrementally by import.shipment (see ImportShipment._write) so product
+    forecasts can read import supply without searching shipments.
+    Changes are appended as delta rows and summed per key on read: imports of
+    different shipments of the same product never update a shared row, so they
+    cannot block or fail each other. The autovacuum compacts the deltas. """
+    _name = 'import.shipment.supply'
+    _description = 'Import Shipment Open Supply'
+    _rec_name = 'product_id'
+
+    product_id = fields.Many2one('product.product', string='Product', required=True, index=True, readonly=True)
+    location_id = fields.Many2one('stock.location', string='Destination Location', required=True, index=True, readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True)
+    open_qty = fields.Float(string='Open Qty', readonly=True)
+
+    def init(self):
+        # Databases set up before the ledger held deltas have one row per key
+        self.env.cr.execute("""
+            ALTER TABLE import_shipment_supply
+            DROP CONSTRAINT IF EXISTS import_shipment_supply_product_location_company_uniq
+        """)
+        self._rebuild()
+
+    @api.model
+    def _contributions_query(self):
+        """ Open quantity of each shipment, with its ledger key.
+        Columns: shipment id, product_id, location_id, company_id, open quantity """
+        return """
+            SELECT shipment.id,
+                   shipment.product_id,
+                   shipment.location_dest_id,
+                   shipment.company_id,
+                   CASE WHEN shipment.active AND shipment.state IN %s
+                        THEN COALESCE(shipment.open_qty, 0.0) ELSE 0.0 END
+              FROM import_shipment shipment
+             WHERE shipment.product_id IS NOT NULL
+               AND shipment.location_dest_id IS NOT NULL
+               AND shipment.company_id IS NOT NULL
+        """
+
+    @api.model
+    def _get_contributions(self, shipment_ids):
+        """ Returns a dict: (product_id, location_id, company_id) -> open qty of shipment_ids """
+        if not shipment_ids:
+            return {}
+        self.env.cr.execute(
+            self._contributions_query() + " AND shipment.id IN %s",
+            [OPEN_STATES, tuple(shipment_ids)]
+        )
+        contributions = {}
+        for _id, product_id, location_id, company_id, qty in self.env.cr.fetchall():
+            key = (product_id, location_id, company_id)
+            contributions[key] = contributions.get(key, 0.0) + qty
+        return contributions
+
+    @api.model
+    def _apply_deltas(self, before, after):
+        """ Appends (after - before) to the ledger in one insert. """
+        deltas = dict(after)
+        for key, qty in before.items():
+            deltas[key] = deltas.get(key, 0.0) - qty
+        rows = sorted(key + (qty,) for key, qty in deltas.items() if qty)
+        if not rows:
+            return
+        self.flush_model()
+        execute_values(self.env.cr._obj, """
+            INSERT INTO import_shipment_supply (product_id, location_id, company_id, open_qty)
+            VALUES %s
+        """, rows)
+        self.invalidate_model(['open_qty'])
+
+    @api.autovacuum
+    def _gc_compact(self):
+        """ Merges the delta rows into one row per key. Rows appended meanwhile
+        by other transactions are not visible here and are kept as they are. """
+        self.flush_model()
+        self.env.cr.execute("""
+            WITH deltas AS (
+                DELETE FROM import_shipment_supply
+                  RETURNING product_id, location_id, company_id, open_qty
+            )
+            INSERT INTO import_shipment_supply (product_id, location_id, company_id, open_qty)
+            SELECT product_id, location_id, company_id, SUM(open_qty)
+              FROM deltas
+          GROUP BY product_id, location_id, company_id
+            HAVING SUM(open_qty) != 0
+        """)
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild(self):
+        """ Recomputes the whole ledger from the shipments (install, repair). """
+        self.env.cr.execute("DELETE FROM import_shipment_supply")
+        self.env.cr.execute("""
+            INSERT INTO import_shipment_supply (product_id, location_id, company_id, open_qty)
+            SELECT product_id, location_id, company_id, SUM(qty)
+              FROM ({query}) AS contribution(id, product_id, location_id, company_id, qty)
+          GROUP BY product_id, location_id, company_id
+            HAVING SUM(qty) != 0
+        """.format(query=self._contributions_query()), [OPEN_STATES])
+        self.invalidate_model()
+
+    @api.model
+    def _get_open_qty_by_product(self, products, location_domain, to_date=False):
+        """ Returns a dict: product_id -> open import qty for locations matching location_domain.
+        location_domain is a domain on 'location_id' (as for quants). With to_date,
+        only shipments expected by that date (or without expected date) are counted:
+        the ledger has no dates, so they are summed from the shipments instead. """
+        if not products:
+            return {}
+        if to_date:
+            return self._get_open_qty_by_product_at(products, location_domain, to_date)
+        groups = self._read_group(
+            [('product_id', 'in', products.ids)] + location_domain,
+            ['product_id', 'open_qty:sum'],
+            ['product_id'],
+        )
+        return {group['product_id'][0]: group['open_qty'] for group in groups}
+
+    @api.model
+    def _get_open_qty_by_product_at(self, products, location_domain, to_date):
+        # Same rows as the ledger (see _contributions_query), restricted by expected date
+        shipment_location_domain = [
+            (leaf[0].replace('location_id', 'location_dest_id', 1), leaf[1], leaf[2])
+            if isinstance(leaf, (list, tuple)) and leaf[0].split('.')[0] == 'location_id' else leaf
+            for leaf in location_domain
+        ]
+        to_date = fields.Datetime.to_datetime(to_date).date()
+        groups = self.env['import.shipment']._read_group(
+            [
+                ('product_id', 'in', products.ids),
+                ('state', 'in', OPEN_STATES),
+                ('location_dest_id', '!=', False),
+                ('company_id', '!=', False),
+                '|', ('expected_date', '=', False), ('expected_date', '<=', to_date),
+            ] + shipment_location_domain,
+            ['product_id', 'open_qty:sum'],
+            ['product_id'],
+        )
+        return {group['product_id'][0]: group['open_qty'] for group in groups}
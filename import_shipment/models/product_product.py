@@ -4,3 +4,20 @@ class ProductProduct(models.Model):
     _inherit = 'product.product'
 
     x_manufacturer_code = fields.Char(related='product_tmpl_id.manufacturer_pref', string='X Manufacturer Code', readonly=False, store=True)
+
+    def _compute_quantities_dict(self, lot_id, owner_id, package_id, from_date=False, to_date=False):
+        res = super(ProductProduct, self)._compute_quantities_dict(
+            lot_id, owner_id, package_id, from_date=from_date, to_date=to_date)
+        # Import shipments skip picking creation, so their open quantity is not
+        # in any incoming stock.move. Add it from the supply ledger instead
+        # (at to_date: only shipments expected by then).
+        if lot_id or owner_id or package_id or from_date:
+            return res
+        domain_quant_loc = self._get_domain_locations()[0]
+        supply_map = self.env['import.shipment.supply'].sudo()._get_open_qty_by_product(
+            self, domain_quant_loc, to_date=to_date)
+        for product_id, qty in supply_map.items():
+            if product_id in res and qty:
+                res[product_id]['incoming_qty'] += qty
+                res[product_id]['virtual_available'] += qty
+        return res
@@ -1,4 +1,9 @@
-from odoo import models, api
+import logging
+import time
+
+from odoo import models, api, _
+
+_logger = logging.getLogger(__name__)
 
 class PurchaseOrder(models.Model):
     _inherit = 'purchase.order'
@@ -14,26 +19,49 @@ class PurchaseOrder(models.Model):
 
     def button_confirm(self):
         res = super(PurchaseOrder, self).button_confirm()
-        # Create import shipment records if picking type has use_import_shipment
-        for order in self:
-            if order.picking_type_id.use_import_shipment:
-                for line in order.order_line:
-                    if line.product_id.type == 'service':
-                        continue
-                    self.env['import.shipment'].create({
-                        'partner_id': order.partner_id.id,
-                        'purchase_line_id': line.id,
-                        'ordered_qty': line.product_qty,
-                        'expected_date': line.date_planned.date() if line.date_planned else False,
-                    })
+        # Create import shipment records if picking type has use_import_shipment,
+        # for all eligible lines of all orders in one multi-create
+        shipment_vals_list = []
+        for order in self.filtered(lambda o: o.picking_type_id.use_import_shipment):
+            for line in order.order_line:
+                if line.product_id.type == 'service':
+                    continue
+                shipment_vals_list.append({
+                    'partner_id': order.partner_id.id,
+                    'purchase_line_id': line.id,
+                    'ordered_qty': line.product_qty,
+                    'expected_date': line.date_planned.date() if line.date_planned else False,
+                })
+        if shipment_vals_list:
+            self.env['import.shipment'].create(shipment_vals_list)
         return res
 
     def button_cancel(self):
         res = super(PurchaseOrder, self).button_cancel()
-        for order in self:
-            shipments = self.env['import.shipment'].search([
-                ('purchase_line_id', 'in', order.order_line.ids)
-            ])
-            if shipments:
-                shipments.write({'state': 'cancel'})
+        shipments = self.env['import.shipment'].search([
+            ('purchase_line_id', 'in', self.order_line.ids)
+        ])
+        if shipments:
+            shipments.write({'state': 'cancel'})
         return res
+
+    def action_mass_confirm(self):
+        """ Server action: confirms the selected RFQs in one batch and reports timings. """
+        orders = self.filtered(lambda o: o.state in ['draft', 'sent'])
+        start = time.time()
+        orders.button_confirm()
+        elapsed = time.time() - start
+        shipment_count = self.env['import.shipment'].search_count([('purchase_order_id', 'in', orders.ids)])
+        _logger.info("Mass confirmed %s purchase orders (%s import shipments) in %.2fs",
+                     len(orders), shipment_count, elapsed)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Purchase Orders Confirmed'),
+                'message': _('%s orders confirmed, %s import shipments created in %.2f s.') % (
+                    len(orders), shipment_count, elapsed),
+                'type': 'success',
+                'sticky': False,
+            },
+        }
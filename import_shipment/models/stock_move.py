@@ -9,29 +9,27 @@ class StockMove(models.Model):
     def write(self, vals):
         moves_to_revert = self.env['stock.move']
         if 'state' in vals and vals['state'] == 'cancel':
-            for move in self:
-                if move.state != 'cancel' and move.import_shipment_id:
-                    moves_to_revert |= move
+            moves_to_revert = self.filtered(lambda m: m.state != 'cancel' and m.import_shipment_id)
 
+        # received_qty of the shipments follows move state and quantity_done
+        # through its dependencies: the ORM recomputes it once for all of them
         res = super(StockMove, self).write(vals)
 
-        if vals.get('state') == 'done':
-            for move in self:
-                if move.import_shipment_id:
-                    move.import_shipment_id._compute_received_qty()
-
-        for move in moves_to_revert:
-            # Revert the quantity on the import shipment line
-            # using product_uom_qty (demand) because that's what was added
-            new_qty = max(0, move.import_shipment_id.imported_qty - move.product_uom_qty)
-            move.import_shipment_id.sudo().write({'imported_qty': new_qty})
+        if moves_to_revert:
+            moves_to_revert._revert_import_shipment_qty()
 
         return res
 
     def unlink(self):
-        for move in self:
-            if move.state != 'cancel' and move.import_shipment_id:
-                new_qty = max(0, move.import_shipment_id.imported_qty - move.product_uom_qty)
-                move.import_shipment_id.sudo().write({'imported_qty': new_qty})
-        
+        self.filtered(lambda m: m.state != 'cancel' and m.import_shipment_id)._revert_import_shipment_qty()
         return super(StockMove, self).unlink()
+
+    def _revert_import_shipment_qty(self):
+        """ Reverts the quantity these moves added on their import shipment lines,
+        using product_uom_qty (demand) because that's what was added.
+        Quantities are summed per shipment and subtracted in one UPDATE. """
+        deltas = {}
+        for move in self:
+            shipment_id = move.import_shipment_id.id
+            deltas[shipment_id] = deltas.get(shipment_id, 0.0) + move.product_uom_qty
+        self.env['import.shipment'].sudo()._decrement_imported_qty(deltas)
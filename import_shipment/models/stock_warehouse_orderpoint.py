@@ -37,39 +37,13 @@ class StockWarehouseOrderpoint(models.Model):
         """
         return super()._get_product_context()
 
-    # Re-reading the requirement 9.2:
-    # stock.warehouse.orderpoint -> _compute_qty_to_order
-    # MRP open_qty alanını dikkate alır.
-    
-    # In Odoo 16, _compute_qty_to_order is working on the recordset.
-    
-    def _compute_qty_to_order(self):
-        super(StockWarehouseOrderpoint, self)._compute_qty_to_order()
-        for orderpoint in self:
-            # We want to REDUCE the qty_to_order by the amount we have coming in via Import Shipments
-            # because Odoo sees them as missing (since no stock.move exists yet).
-            
-            # Find open import shipments for this product and location (or company/warehouse)
-            # Orderpoints are per location. Import Shipments are per PO (partner location -> destination).
-            # We assume destination is the warehouse stock location.
-            
-            domain = [
-                ('product_id', '=', orderpoint.product_id.id),
-                ('state', 'in', ['waiting', 'imported', 'partially_imported']),
-                # We need to match location.
-                # Import shipments (via PO) usually go to Picking Type -> Default Dest Location.
-                # verifying if it matches orderpoint.location_id is complex but necessary for multi-warehouse.
-                # For simplicity, assuming company match or single warehouse.
-                ('purchase_line_id.order_id.picking_type_id.default_location_dest_id', '=', orderpoint.location_id.id)
-            ]
-            
-            shipments = self.env['import.shipment'].search(domain)
-            incoming_shipment_qty = sum(shipments.mapped('open_qty'))
-            
-            # If we have 100 needed, but 40 are coming in shipment (and not in moves), 
-            # Odoo thinks we need 100. We should say we need 60.
-            # So we subtract incoming_shipment_qty from qty_to_order.
-            
-            if incoming_shipment_qty > 0:
-                orderpoint.qty_to_order = max(0.0, orderpoint.qty_to_order - incoming_shipment_qty)
-
+    # Requirement 9.2 (stock.warehouse.orderpoint -> _compute_qty_to_order,
+    # MRP open_qty alanını dikkate alır): _compute_qty_to_order used to subtract
+    # the open_qty of open import shipments from qty_to_order, batched per
+    # (product, destination location) by _get_import_shipment_supply. Both were
+    # replaced by the import.shipment.supply ledger, which
+    # ProductProduct._compute_quantities_dict adds to product.virtual_available.
+    # qty_forecast reads virtual_available for the orderpoint's location, so the
+    # supply already lowers qty_to_order through the standard computation, and
+    # MTO and MRP see it as well. Do not subtract it here again: it would be
+    # counted twice.
@@ -0,0 +1,7 @@
+from . import test_fifo_planner
+from . import test_stock_move
+from . import test_concurrent_allocation
+from . import test_excel_parser
+from . import test_parse_cache
+from . import test_background_confirm
+from . import test_import_shipment_supply
@@ -0,0 +1,166 @@
+import base64
+from unittest.mock import patch
+
+from psycopg2 import errors
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.import_shipment.wizard import import_shipment_excel_wizard
+from odoo.addons.import_shipment.wizard.import_shipment_excel_wizard import ImportShipmentExcelWizard
+
+
+@tagged('post_install', '-at_install')
+class TestBackgroundConfirm(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestBackgroundConfirm, cls).setUpClass()
+        vendor = cls.env['res.partner'].create({'name': 'Background Vendor Test'})
+        picking_type = cls.env.ref('stock.warehouse0').in_type_id
+        picking_type.use_import_shipment = True
+        products = cls.env['product.product'].create([{
+            'name': 'Background Product %s' % index,
+            'type': 'product',
+        } for index in range(3)])
+        purchase_order = cls.env['purchase.order'].create({
+            'partner_id': vendor.id,
+            'picking_type_id': picking_type.id,
+            'order_line': [(0, 0, {
+                'product_id': product.id,
+                'product_qty': 100.0,
+                'price_unit': 1.0,
+            }) for product in products],
+        })
+        purchase_order.button_confirm()
+        cls.shipments = cls.env['import.shipment'].search([('purchase_order_id', '=', purchase_order.id)], order='id')
+
+    def test_01_resume_after_failed_chunk(self):
+        """ A resumed job continues after the last committed chunk without importing it twice """
+        wizard = self.env['import.shipment.excel.wizard'].create({
+            'transfer_method': 'order',
+            'import_file': base64.b64encode(b'-'),
+            'state': 'validated',
+            'line_ids': [(0, 0, {
+                'reference': shipment.name,
+                'quantity': 10.0,
+                'state': 'success',
+                'match_ids': [(6, 0, shipment.ids)],
+            }) for shipment in self.shipments],
+        })
+        self.patch(self.env.cr, 'commit', lambda: None)
+        self.patch(import_shipment_excel_wizard, 'JOB_CHUNK_SIZE', 1)
+
+        confirm_lines = ImportShipmentExcelWizard._confirm_lines
+        calls = []
+
+        def fail_second_chunk(wizard, valid_lines, locked=False):
+            calls.append(valid_lines.ids)
+            if len(calls) == 2:
+                # Work of the chunk done before the failure must be rolled back
+                confirm_lines(wizard, valid_lines, locked=locked)
+                raise ValueError("Interrupted")
+            return confirm_lines(wizard, valid_lines, locked=locked)
+
+        wizard.action_confirm_async()
+        with patch.object(ImportShipmentExcelWizard, '_confirm_lines', fail_second_chunk):
+            wizard._run_job()
+        self.assertRecordValues(wizard, [{'job_state': 'failed', 'job_offset': 1, 'job_total': 3}])
+        self.assertEqual(self.shipments.mapped('imported_qty'), [10.0, 0.0, 0.0])
+
+        wizard.action_resume_job()
+        wizard._run_job()
+        self.assertRecordValues(wizard, [{'job_state': 'done', 'state': 'done', 'job_offset': 3, 'job_progress': 100.0}])
+        self.assertEqual(self.shipments.mapped('imported_qty'), [10.0, 10.0, 10.0])
+        self.assertEqual(len(wizard.picking_ids), 3)
+
+    def test_02_age_cleanup_skips_unfinished_confirmations(self):
+        """ Old wizards are cleaned up, except those whose confirmation still runs or has committed chunks """
+        wizards = self.env['import.shipment.excel.wizard'].create([{
+            'transfer_method': 'order',
+            'import_file': base64.b64encode(b'-'),
+            'job_state': job_state,
+            'job_offset': job_offset,
+            'line_ids': [(0, 0, {'reference': 'REF'})],
+        } for job_state, job_offset in [('queued', 0), ('failed', 500), ('failed', 0), ('done', 1000), (False, 0)]])
+        lines = wizards.line_ids
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE import_shipment_excel_wizard SET write_date = now() - interval '2 days' WHERE id IN %s",
+                            [tuple(wizards.ids)])
+        self.env.cr.execute("UPDATE import_shipment_excel_line SET write_date = now() - interval '2 days' WHERE id IN %s",
+                            [tuple(lines.ids)])
+
+        self.env['import.shipment.excel.line']._transient_clean_rows_older_than(3600)
+        self.assertEqual(lines.exists(), wizards[:2].line_ids)
+        wizards._transient_clean_rows_older_than(3600)
+        self.assertEqual(wizards.exists(), wizards[:2])
+
+    def test_03_lock_timeout_is_restored(self):
+        """ The lock timeout of the allocation does not outlive the locking statement """
+        self.env.cr.execute("SHOW lock_timeout")
+        previous_lock_timeout = self.env.cr.fetchone()[0]
+        self.shipments._lock_for_allocation(lock_timeout='3s')
+        self.env.cr.execute("SHOW lock_timeout")
+        self.assertEqual(self.env.cr.fetchone()[0], previous_lock_timeout)
+
+    def _create_job_wizard(self):
+        wizard = self.env['import.shipment.excel.wizard'].create({
+            'transfer_method': 'order',
+            'import_file': base64.b64encode(b'-'),
+            'state': 'validated',
+            'line_ids': [(0, 0, {
+                'reference': shipment.name,
+                'quantity': 10.0,
+                'state': 'success',
+                'match_ids': [(6, 0, shipment.ids)],
+            }) for shipment in self.shipments],
+        })
+        # The chunk savepoint already undoes the work of a conflicting chunk
+        self.patch(self.env.cr, 'commit', lambda: None)
+        self.patch(self.env.cr, 'rollback', lambda: None)
+        self.patch(import_shipment_excel_wizard.time, 'sleep', lambda seconds: None)
+        self.patch(import_shipment_excel_wizard, 'JOB_CHUNK_SIZE', 1)
+        return wizard
+
+    def test_04_concurrency_errors_are_retried(self):
+        """ A chunk conflicting with a concurrent import is retried from its checkpoint """
+        wizard = self._create_job_wizard()
+        confirm_lines = ImportShipmentExcelWizard._confirm_lines
+        calls = []
+
+        def conflict_twice_on_second_chunk(wizard, valid_lines, locked=False):
+            calls.append(valid_lines.ids)
+            result = confirm_lines(wizard, valid_lines, locked=locked)
+            if len(calls) == 2:
+                raise errors.SerializationFailure("could not serialize access due to concurrent update")
+            if len(calls) == 3:
+                raise errors.DeadlockDetected("deadlock detected")
+            return result
+
+        wizard.action_confirm_async()
+        with patch.object(ImportShipmentExcelWizard, '_confirm_lines', conflict_twice_on_second_chunk):
+            wizard._run_job()
+        second_line = wizard.line_ids.sorted('id')[1]
+        self.assertEqual(calls[1:4], [second_line.ids] * 3)
+        self.assertRecordValues(wizard, [{'job_state': 'done', 'state': 'done', 'job_offset': 3}])
+        self.assertEqual(self.shipments.mapped('imported_qty'), [10.0, 10.0, 10.0])
+        self.assertEqual(len(wizard.picking_ids), 3)
+
+    def test_05_concurrency_errors_fail_after_max_tries(self):
+        """ A chunk that keeps conflicting marks the job failed at its checkpoint """
+        wizard = self._create_job_wizard()
+        confirm_lines = ImportShipmentExcelWizard._confirm_lines
+        calls = []
+
+        def always_locked_after_first_chunk(wizard, valid_lines, locked=False):
+            calls.append(valid_lines.ids)
+            if len(calls) > 1:
+                raise errors.LockNotAvailable("canceling statement due to lock timeout")
+            return confirm_lines(wizard, valid_lines, locked=locked)
+
+        wizard.action_confirm_async()
+        with patch.object(ImportShipmentExcelWizard, '_confirm_lines', always_locked_after_first_chunk):
+            wizard._run_job()
+        self.assertEqual(len(calls), 1 + import_shipment_excel_wizard.ALLOCATION_MAX_TRIES)
+        self.assertRecordValues(wizard, [{'job_state': 'failed', 'job_offset': 1}])
+        self.assertEqual(self.shipments.mapped('imported_qty'), [10.0, 0.0, 0.0])
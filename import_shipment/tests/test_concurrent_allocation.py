@@ -0,0 +1,126 @@
+import base64
+import threading
+import time
+
+from odoo import api, SUPERUSER_ID
+from odoo.service.model import retrying
+from odoo.sql_db import db_connect
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+
+@tagged('post_install', '-at_install', '-standard', 'import_shipment_concurrency')
+class TestConcurrentAllocation(TransactionCase):
+    """ Run with --test-tags import_shipment_concurrency
+
+    Each importer confirms its own wizard on its own database connection, as
+    concurrent requests do, so their row locks really contend; conflicts are
+    retried by the same retrying() the server wraps requests in.
+    Such connections cannot see the test transaction: the fixtures are
+    committed and deleted again by the cleanup, which is why this test is not
+    part of the standard run. """
+
+    importer_count = 4
+
+    def setUp(self):
+        super(TestConcurrentAllocation, self).setUp()
+        self.dbname = self.env.cr.dbname
+        with db_connect(self.dbname).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            vendor = env['res.partner'].create({'name': 'Concurrent Vendor Test'})
+            picking_type = env.ref('stock.warehouse0').in_type_id
+            use_import_shipment = picking_type.use_import_shipment
+            picking_type.use_import_shipment = True
+            products = env['product.product'].create([{
+                'name': 'Concurrent Product %s' % index,
+                'type': 'product',
+            } for index in range(3)])
+            purchase_order = env['purchase.order'].create({
+                'partner_id': vendor.id,
+                'picking_type_id': picking_type.id,
+                'order_line': [(0, 0, {
+                    'product_id': product.id,
+                    'product_qty': 100.0,
+                    'price_unit': 1.0,
+                }) for product in products],
+            })
+            purchase_order.button_confirm()
+            shipments = env['import.shipment'].search([('purchase_order_id', '=', purchase_order.id)])
+            self.assertEqual(len(shipments), 3)
+            # Importer n imports n units of every shipment, with the lines in
+            # reverse order on purpose: locking must not depend on it
+            wizards = env['import.shipment.excel.wizard'].create([{
+                'transfer_method': 'order',
+                'allocation_mode': 'locked',
+                'import_file': base64.b64encode(b'-'),
+                'state': 'validated',
+                'line_ids': [(0, 0, {
+                    'reference': shipment.name,
+                    'quantity': float(index + 1),
+                    'state': 'success',
+                    'match_ids': [(6, 0, shipment.ids)],
+                }) for shipment in shipments.sorted('id', reverse=True)],
+            } for index in range(self.importer_count)])
+            self.shipment_ids = shipments.ids
+            self.wizard_ids = wizards.ids
+            fixture_ids = (vendor.id, picking_type.id, use_import_shipment, products.ids, purchase_order.id, wizards.ids)
+        self.addCleanup(self._delete_fixtures, *fixture_ids)
+
+    def _delete_fixtures(self, vendor_id, picking_type_id, use_import_shipment, product_ids, purchase_order_id, wizard_ids):
+        with db_connect(self.dbname).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['import.shipment.excel.wizard'].browse(wizard_ids).unlink()
+            pickings = env['stock.move'].search([('import_shipment_id.purchase_order_id', '=', purchase_order_id)]).picking_id
+            pickings.action_cancel()
+            pickings.unlink()
+            purchase_order = env['purchase.order'].browse(purchase_order_id)
+            purchase_order.button_cancel()
+            purchase_order.unlink()
+            env['import.shipment.supply'].search([('product_id', 'in', product_ids)]).unlink()
+            env['product.product'].browse(product_ids).unlink()
+            env['res.partner'].browse(vendor_id).unlink()
+            env['stock.picking.type'].browse(picking_type_id).use_import_shipment = use_import_shipment
+
+    def test_01_concurrent_wizard_confirmations(self):
+        """ Wizards confirmed at the same time on separate connections never lose an update """
+        barrier = threading.Barrier(self.importer_count)
+        failures = []
+
+        ImportShipment = type(self.env['import.shipment'])
+        lock_for_allocation = ImportShipment._lock_for_allocation
+
+        def hold_locks(shipments, *args, **kwargs):
+            # Keep the locks a little so that the importers overlap
+            lock_for_allocation(shipments, *args, **kwargs)
+            time.sleep(0.2)
+
+        def importer(wizard_id):
+            try:
+                barrier.wait(timeout=30)
+                with db_connect(self.dbname).cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    wizard = env['import.shipment.excel.wizard'].browse(wizard_id)
+                    retrying(wizard.action_confirm, env)
+            except Exception as e:
+                failures.append(e)
+
+        self.patch(ImportShipment, '_lock_for_allocation', hold_locks)
+        threads = [threading.Thread(target=importer, args=(wizard_id,)) for wizard_id in self.wizard_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertFalse(failures)
+        with db_connect(self.dbname).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            self.assertEqual(set(env['import.shipment.excel.wizard'].browse(self.wizard_ids).mapped('state')), {'done'})
+            shipments = env['import.shipment'].browse(self.shipment_ids)
+            # 1 + 2 + 3 + 4
+            self.assertEqual(set(shipments.mapped('imported_qty')), {10.0})
+            self.assertEqual(set(shipments.mapped('open_qty')), {90.0})
+            self.assertEqual(set(shipments.mapped('state')), {'partially_imported'})
+            # One incoming move per importer, for the quantity it imported
+            for shipment in shipments:
+                self.assertEqual(len(shipment.move_ids), self.importer_count)
+                self.assertEqual(sum(shipment.move_ids.mapped('product_uom_qty')), 10.0)
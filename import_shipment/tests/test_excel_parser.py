@@ -0,0 +1,115 @@
+import base64
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import skipIf
+
+import xlrd
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.import_shipment.wizard import import_shipment_excel_wizard
+
+
+class FakeSheet:
+    """ Minimal stand-in for an xlrd sheet, built from (value, ctype) columns """
+
+    def __init__(self, columns, datemode=0):
+        self.columns = columns
+        self.ncols = len(columns)
+        self.nrows = len(columns[0])
+        self.book = SimpleNamespace(datemode=datemode)
+
+    def cell(self, row, col):
+        value, ctype = self.columns[col][row]
+        return SimpleNamespace(value=value, ctype=ctype)
+
+    def cell_value(self, row, col):
+        return self.columns[col][row][0]
+
+    def cell_type(self, row, col):
+        return self.columns[col][row][1]
+
+    def col_values(self, col, start_rowx=0):
+        return [value for value, _ctype in self.columns[col][start_rowx:]]
+
+    def col_types(self, col, start_rowx=0):
+        return [ctype for _value, ctype in self.columns[col][start_rowx:]]
+
+
+@tagged('post_install', '-at_install')
+@skipIf(import_shipment_excel_wizard.np is None, "numpy is not installed")
+class TestExcelColumnParser(TransactionCase):
+
+    def test_01_same_result_as_row_parser(self):
+        """ The column-wise parser returns exactly what the row parser returns """
+        TEXT, NUMBER, DATE, EMPTY = xlrd.XL_CELL_TEXT, xlrd.XL_CELL_NUMBER, xlrd.XL_CELL_DATE, xlrd.XL_CELL_EMPTY
+        # Dates: a serial with time, text, empty, invalid text, an ambiguous
+        # 1900 serial, a time without date, a numeric 0, a zero serial and a
+        # serial rounded up to the next day
+        dates = [
+            (45000.5, DATE), ('2024-01-02', TEXT), ('', EMPTY), ('nope', TEXT),
+            (30.0, DATE), (0.5, DATE), (0.0, NUMBER), (0.0, DATE), (45000.999999999, DATE),
+        ]
+        row_count = len(dates)
+        sheet = FakeSheet([
+            [('Ref', TEXT), (' A-1 ', TEXT), (123.0, NUMBER), ('B2', TEXT), ('', EMPTY)] + [('C3', TEXT)] * (row_count - 4),
+            [('Qty', TEXT), (5.0, NUMBER), ('', EMPTY), ('abc', TEXT), ('7', TEXT)] + [(1.0, NUMBER)] * (row_count - 4),
+            [('Price', TEXT), (1.5, NUMBER), (2.0, NUMBER), (3.0, NUMBER), ('', EMPTY)] + [(1.0, NUMBER)] * (row_count - 4),
+            [('Date', TEXT)] + dates,
+        ])
+        wizard = self.env['import.shipment.excel.wizard']
+        expected = [wizard._parse_excel_row(sheet, row_index) for row_index in range(1, sheet.nrows)]
+        self.assertEqual(wizard._parse_excel_columns(sheet), expected)
+        self.assertEqual([row[-1] for row in expected], [
+            'pending', 'pending', 'failed', 'failed', 'failed', 'failed', 'pending', 'pending', 'pending',
+        ])
+        self.assertEqual([row[3] for row in expected[6:]], [False, False, datetime(2023, 3, 16)])
+
+        # The 1904 date system has no ambiguous serials
+        sheet.book.datemode = 1
+        expected = [wizard._parse_excel_row(sheet, row_index) for row_index in range(1, sheet.nrows)]
+        self.assertEqual(wizard._parse_excel_columns(sheet), expected)
+        self.assertEqual(expected[4][3], datetime(1904, 1, 31))
+
+
+@tagged('post_install', '-at_install')
+class TestExcelUpload(TransactionCase):
+
+    def test_01_upload_is_read_from_attachment(self):
+        """ The upload is kept as an attachment and read back without decoding the field """
+        content = b'Ref;Qty;Price;Date\nA-1;5;1.5;2024-01-02\n'
+        wizard = self.env['import.shipment.excel.wizard'].create({
+            'transfer_method': 'fifo',
+            'import_file': base64.b64encode(content),
+            'file_name': 'upload.xls',
+        })
+        attachment = wizard._get_import_attachment()
+        self.assertTrue(attachment)
+        with wizard._open_import_file() as file_data:
+            self.assertEqual(bytes(file_data[:]), content)
+
+
+@tagged('post_install', '-at_install')
+class TestExcelPreviewPaging(TransactionCase):
+
+    def test_01_counters_and_pages(self):
+        """ State counters follow line changes and the form only gets one page of lines """
+        wizard = self.env['import.shipment.excel.wizard'].create({
+            'transfer_method': 'fifo',
+            'import_file': base64.b64encode(b'-'),
+            'page_size': 10,
+            'line_ids': [(0, 0, {'reference': 'R%s' % index, 'quantity': 1.0}) for index in range(25)],
+        })
+        self.assertRecordValues(wizard, [{'line_count': 25, 'pending_count': 25, 'failed_count': 0, 'page_count': 3}])
+        self.assertEqual(len(wizard.display_line_ids), 10)
+
+        wizard.line_ids[:7].write({'state': 'failed'})
+        self.assertRecordValues(wizard, [{'line_count': 25, 'pending_count': 18, 'failed_count': 7}])
+
+        wizard.write({'line_filter': 'failed', 'page': 1})
+        self.assertEqual(wizard.display_line_ids, wizard.line_ids[:7])
+        self.assertEqual(wizard.page_count, 1)
+
+        wizard.write({'line_filter': 'all', 'page': 3})
+        self.assertEqual(wizard.display_line_ids, wizard.line_ids.sorted('id')[20:])
@@ -0,0 +1,50 @@
+import logging
+import time
+from datetime import date
+
+from odoo.tests.common import BaseCase
+
+from odoo.addons.import_shipment.wizard.fifo_planner import plan_fifo_allocation
+
+_logger = logging.getLogger(__name__)
+
+
+class TestFifoPlanner(BaseCase):
+
+    def setUp(self):
+        super(TestFifoPlanner, self).setUp()
+        # shipment_id -> (open_qty, expected_date)
+        self.shipments = {
+            1: (10.0, date(2024, 3, 1)),
+            2: (5.0, date(2024, 1, 1)),
+            3: (8.0, date(2024, 2, 1)),
+        }
+
+    def test_01_fill_by_expected_date(self):
+        """ Targets are filled by expected date, the last one takes the rest """
+        allocations, last_rows = plan_fifo_allocation([('r1', 30.0, [1, 2, 3])], self.shipments)
+        self.assertEqual(allocations, {2: 5.0, 3: 8.0, 1: 17.0})
+        self.assertEqual(last_rows, {1: 'r1', 2: 'r1', 3: 'r1'})
+
+    def test_02_shared_targets_use_remaining_open_qty(self):
+        """ A second row sharing targets starts where the first one stopped """
+        rows = [('r1', 4.0, [1, 2, 3]), ('r2', 6.0, [1, 2, 3])]
+        allocations, last_rows = plan_fifo_allocation(rows, self.shipments)
+        self.assertEqual(allocations, {2: 5.0, 3: 5.0})
+        self.assertEqual(last_rows, {2: 'r2', 3: 'r2'})
+
+    def test_03_ignores_empty_rows(self):
+        rows = [('r1', 0.0, [1]), ('r2', 3.0, [])]
+        self.assertEqual(plan_fifo_allocation(rows, self.shipments), ({}, {}))
+
+    def test_04_large_plan(self):
+        """ 100k rows over 20k shipments, quantities are fully allocated """
+        shipments = {sid: (5.0, date(2024, 1, 1 + sid % 28)) for sid in range(1, 20001)}
+        rows = [
+            (row, 2.0, [1 + (row * 7 + offset) % 20000 for offset in range(3)])
+            for row in range(100000)
+        ]
+        start = time.time()
+        allocations, _last_rows = plan_fifo_allocation(rows, shipments)
+        _logger.info("Planned 100k rows in %.3fs", time.time() - start)
+        self.assertAlmostEqual(sum(allocations.values()), 200000.0)
@@ -0,0 +1,57 @@
+from datetime import date, datetime
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+
+@tagged('post_install', '-at_install')
+class TestImportShipmentSupply(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestImportShipmentSupply, cls).setUpClass()
+        vendor = cls.env['res.partner'].create({'name': 'Supply Vendor Test'})
+        picking_type = cls.env.ref('stock.warehouse0').in_type_id
+        picking_type.use_import_shipment = True
+        cls.product = cls.env['product.product'].create({'name': 'Supply Product', 'type': 'product'})
+        purchase_order = cls.env['purchase.order'].create({
+            'partner_id': vendor.id,
+            'picking_type_id': picking_type.id,
+            'order_line': [(0, 0, {
+                'product_id': cls.product.id,
+                'product_qty': qty,
+                'price_unit': 1.0,
+            }) for qty in (10.0, 5.0)],
+        })
+        purchase_order.button_confirm()
+        shipments = cls.env['import.shipment'].search([('purchase_order_id', '=', purchase_order.id)], order='ordered_qty desc')
+        shipments[0].expected_date = date(2030, 1, 10)
+        shipments[1].expected_date = date(2030, 3, 10)
+        cls.shipments = shipments
+
+    def test_01_forecast_at_date(self):
+        """ Forecasts at a date only count the shipments expected by then """
+        self.assertEqual(self.product.virtual_available, 15.0)
+        self.assertEqual(self.product.with_context(to_date=datetime(2030, 1, 1)).virtual_available, 0.0)
+        self.assertEqual(self.product.with_context(to_date=datetime(2030, 2, 1)).virtual_available, 10.0)
+        self.assertEqual(self.product.with_context(to_date=datetime(2030, 4, 1)).incoming_qty, 15.0)
+
+    def test_02_deltas_are_appended_and_compacted(self):
+        """ Shipment changes append ledger rows instead of updating a shared one """
+        Supply = self.env['import.shipment.supply']
+        domain = [('product_id', '=', self.product.id)]
+        self.env.flush_all()
+        rows = Supply.search(domain)
+        qtys = rows.mapped('open_qty')
+
+        self.shipments[0].imported_qty = 4.0
+        self.env.flush_all()
+        new_rows = Supply.search(domain)
+        self.assertGreater(len(new_rows), len(rows))
+        self.assertEqual(new_rows & rows, rows)
+        self.assertEqual(rows.mapped('open_qty'), qtys)
+        self.assertEqual(sum(new_rows.mapped('open_qty')), 11.0)
+
+        Supply._gc_compact()
+        self.assertRecordValues(Supply.search(domain), [{'open_qty': 11.0}])
+        self.assertEqual(self.product.virtual_available, 11.0)
@@ -0,0 +1,34 @@
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+
+@tagged('post_install', '-at_install')
+class TestParseCache(TransactionCase):
+
+    def setUp(self):
+        super(TestParseCache, self).setUp()
+        self.ParseCache = self.env['import.shipment.parse.cache']
+        self.rows = [['A-1', 5.0, 1.5, '2024-01-02 00:00:00', '', 'pending']]
+
+    def test_01_hit_and_miss_counters(self):
+        """ A stored file is counted as a miss, each lookup afterwards as a hit """
+        self.assertIsNone(self.ParseCache._lookup('a' * 64, '1'))
+        self.ParseCache._store('a' * 64, '1', self.rows)
+        self.assertEqual(self.ParseCache._lookup('a' * 64, '1'), self.rows)
+        self.assertIsNone(self.ParseCache._lookup('a' * 64, '2'), "Another parser version is another entry")
+
+        entry = self.ParseCache.search([('checksum', '=', 'a' * 64)])
+        self.assertRecordValues(entry, [{'hit_count': 1, 'miss_count': 1, 'row_count': 1}])
+
+    def test_02_size_eviction_keeps_recent_entries(self):
+        """ Payloads beyond the size limit are cleared, least recently used first """
+        self.ParseCache._store('a' * 64, '1', self.rows)
+        size = self.ParseCache.search([('checksum', '=', 'a' * 64)]).size
+        self.env['ir.config_parameter'].sudo().set_param('import_shipment.parse_cache_max_size', size)
+        self.env.cr.execute("UPDATE import_shipment_parse_cache SET last_used = last_used - interval '1 hour'")
+
+        self.ParseCache._store('b' * 64, '1', self.rows)
+        self.assertIsNone(self.ParseCache._lookup('a' * 64, '1'))
+        self.assertEqual(self.ParseCache._lookup('b' * 64, '1'), self.rows)
+        self.assertEqual(self.ParseCache.search([('checksum', '=', 'a' * 64)]).miss_count, 1,
+                         "Cleared entries keep their counters")
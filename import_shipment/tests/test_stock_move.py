@@ -0,0 +1,90 @@
+import logging
+import time
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('post_install', '-at_install')
+class TestStockMoveImportShipment(TransactionCase):
+
+    line_count = 5
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestStockMoveImportShipment, cls).setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Import Vendor Test'})
+        cls.picking_type = cls.env.ref('stock.warehouse0').in_type_id
+        cls.picking_type.use_import_shipment = True
+        cls.products = cls.env['product.product'].create([{
+            'name': 'Import Product %s' % index,
+            'type': 'product',
+            'manufacturer_pref': 'PREF%s' % index,
+        } for index in range(cls.line_count)])
+
+    def _create_shipments(self):
+        purchase_order = self.env['purchase.order'].create({
+            'partner_id': self.vendor.id,
+            'picking_type_id': self.picking_type.id,
+            'order_line': [(0, 0, {
+                'product_id': product.id,
+                'product_qty': 10.0,
+                'price_unit': 1.0,
+            }) for product in self.products],
+        })
+        purchase_order.button_confirm()
+        shipments = self.env['import.shipment'].search([('purchase_order_id', '=', purchase_order.id)])
+        self.assertEqual(len(shipments), self.line_count)
+        shipments.write({'imported_qty': 10.0})
+        return shipments
+
+    def _create_picking(self, shipments):
+        return shipments.with_context(
+            items_qty_map={shipment.id: 10.0 for shipment in shipments},
+        ).create_incoming_picking()
+
+    def test_01_validate_consolidated_picking(self):
+        """ Validating one picking for all shipments marks them received """
+        shipments = self._create_shipments()
+        picking = self._create_picking(shipments)
+        self.assertEqual(len(picking), 1)
+        for move in picking.move_ids:
+            move.quantity_done = move.product_uom_qty
+
+        start = time.time()
+        picking.button_validate()
+        _logger.info("Validated a picking of %s moves in %.2fs", self.line_count, time.time() - start)
+
+        self.assertEqual(set(shipments.mapped('received_qty')), {10.0})
+        self.assertEqual(set(shipments.mapped('state')), {'done'})
+
+    def test_02_cancel_reverts_imported_qty_once(self):
+        """ Cancelling a picking gives the quantity back exactly once per move """
+        shipments = self._create_shipments()
+        picking = self._create_picking(shipments)
+        picking.action_cancel()
+        self.assertEqual(set(shipments.mapped('imported_qty')), {0.0})
+        self.assertEqual(set(shipments.mapped('state')), {'waiting'})
+
+    def test_03_cancel_sums_moves_per_shipment(self):
+        """ Moves of several pickings are reverted together and never below zero """
+        shipments = self._create_shipments()
+        pickings = self.env['stock.picking']
+        for qty in (4.0, 6.0):
+            pickings |= shipments.with_context(
+                items_qty_map={shipment.id: qty for shipment in shipments},
+            ).create_incoming_picking()
+        shipments[0].imported_qty = 5.0
+        shipments[1].imported_qty = 15.0
+        pickings.action_cancel()
+        self.assertEqual(shipments.mapped('imported_qty'), [0.0, 5.0] + [0.0] * (self.line_count - 2))
+        self.assertEqual(shipments.mapped('state'), ['waiting', 'partially_imported'] + ['waiting'] * (self.line_count - 2))
+
+
+@tagged('post_install', '-at_install', '-standard', 'import_shipment_benchmark')
+class BenchmarkConsolidatedPicking(TestStockMoveImportShipment):
+    """ Run with --test-tags import_shipment_benchmark """
+
+    line_count = 2000
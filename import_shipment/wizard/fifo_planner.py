@@ -0,0 +1,55 @@
+"""
+Pure in-memory FIFO allocation planner for the import shipment Excel wizard.
+
+Works on plain data only (no ORM, no database) so it can be unit-tested and
+benchmarked on large plans; the wizard applies the resulting plan in one pass.
+"""
+
+
+def plan_fifo_allocation(rows, shipments):
+    """ Distributes the quantity of each Excel row over its matched shipments.
+
+    rows: iterable of (row_key, quantity, shipment_ids), processed in order.
+    shipments: dict shipment_id -> (open_qty, expected_date); expected_date
+        must be comparable (the caller substitutes a default for empty dates).
+
+    Targets of a row are filled by (expected_date, id). Each target gets at most
+    its open quantity, except the last one which takes whatever remains
+    (over-shipment). Open quantities are consumed across rows, so rows sharing
+    targets never allocate from stale values.
+
+    Returns (allocations, last_rows):
+        allocations: dict shipment_id -> allocated quantity
+        last_rows: dict shipment_id -> row_key of the last row allocated to it
+    """
+    open_qty = {shipment_id: open_ for shipment_id, (open_, _date) in shipments.items()}
+    allocations = {}
+    last_rows = {}
+    order_cache = {}
+
+    for row_key, quantity, shipment_ids in rows:
+        remaining_qty = quantity
+        if remaining_qty <= 0 or not shipment_ids:
+            continue
+
+        cache_key = tuple(shipment_ids)
+        targets = order_cache.get(cache_key)
+        if targets is None:
+            targets = sorted(shipment_ids, key=lambda sid: (shipments[sid][1], sid))
+            order_cache[cache_key] = targets
+
+        last_index = len(targets) - 1
+        for index, shipment_id in enumerate(targets):
+            if remaining_qty <= 0:
+                break
+            if index == last_index:
+                qty = remaining_qty
+            else:
+                qty = min(max(0.0, open_qty[shipment_id]), remaining_qty)
+            if qty > 0:
+                open_qty[shipment_id] -= qty
+                allocations[shipment_id] = allocations.get(shipment_id, 0.0) + qty
+                last_rows[shipment_id] = row_key
+                remaining_qty -= qty
+
+    return allocations, last_rows
@@ -1,13 +1,54 @@
-import base64
+import hashlib
+import logging
+import mmap
+import random
+import time
+from contextlib import contextmanager
+
 import xlrd
-from odoo import models, fields, api, _
+from psycopg2 import errors
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError
 
+from .fifo_planner import plan_fifo_allocation
+
+_logger = logging.getLogger(__name__)
+
+# Attempts of a background confirmation chunk that conflicts with a
+# concurrent import before the job is marked failed
+ALLOCATION_MAX_TRIES = 5
+
+# Valid lines allocated per checkpoint of a background confirmation
+JOB_CHUNK_SIZE = 500
+
+# SQL condition on a wizard row (alias "wizard") whose background confirmation
+# still has to run or has committed chunks (see _check_no_job): its wizard and
+# lines are the checkpoint of the job and are left alone by the age cleanup.
+# False when there is no such wizard row.
+UNFINISHED_JOB_SQL = """COALESCE(
+    wizard.job_state IN ('queued', 'running') OR (wizard.job_state = 'failed' AND wizard.job_offset > 0),
+    FALSE)"""
+
+# Version of the parsed row format, part of the parse cache key.
+# Bump it whenever _parse_excel_row / _parse_excel_columns change their output.
+PARSER_VERSION = '2'
+
+# Whole-day ranges of the Excel serials xlrd.xldate_as_tuple turns into a full
+# date, per workbook datemode (0: 1900 based, 1: 1904 based)
+EXCEL_MIN_DATE_DAYS = {0: 61, 1: 1}
+EXCEL_MAX_DATE_DAYS = {0: 2958466, 1: 2958466 - 1462}
+
 class ImportShipmentExcelWizard(models.TransientModel):
     _name = 'import.shipment.excel.wizard'
     _description = 'Import Shipment Excel Wizard'
 
-    import_file = fields.Binary(string='Excel File', required=True)
+    import_file = fields.Binary(string='Excel File', required=True, attachment=True)
     file_name = fields.Char(string='File Name')
     transfer_method = fields.Selection([
         ('order', 'Siparişe İstinaden Aktarım (Order-Based)'),
@@ -33,46 +74,97 @@ class ImportShipmentExcelWizard(models.TransientModel):
 
     picking_type_id = fields.Many2one('stock.picking.type', string='Operasyon Türü', domain=[('code', '=', 'incoming')])
 
-    @api.model
-    def fields_get(self, allfields=None, attributes=None):
-        res = super(ImportShipmentExcelWizard, self).fields_get(allfields, attributes)
-        if 'line_filter' in res:
-            wizard_id = self.env.context.get('wizard_id')
-            if wizard_id:
-                # Use SQL to bypass ANY cache (ORM or Compute)
-                query = """
-                    SELECT state, count(*) 
-                    FROM import_shipment_excel_line 
-                    WHERE wizard_id = %s 
-                    GROUP BY state
-                """
-                self.env.cr.execute(query, [wizard_id])
-                counts = dict(self.env.cr.fetchall())
-                
-                c_pending = counts.get('pending', 0)
-                c_success = counts.get('success', 0)
-                c_warning = counts.get('warning', 0)
-                c_failed = counts.get('failed', 0)
-                c_all = sum(counts.values())
-                
-                res['line_filter']['selection'] = [
-                    ('all', f"Tümü ({c_all})"),
-                    ('pending', f"Beklemede ({c_pending})"),
-                    ('success', f"Başarılı ({c_success})"),
-                    ('warning', f"Kontrol ({c_warning})"),
-                    ('failed', f"Başarısız ({c_failed})"),
-                ]
-        return res
+    allocation_mode = fields.Selection([
+        ('standard', 'Standart'),
+        ('locked', 'Kilitli (Eşzamanlı Aktarımlar İçin Güvenli)')
+    ], string='Dağıtım Modu', default='locked', required=True,
+        help="Kilitli: hedef sevkiyat satırları kimlik sırasıyla kilitlenir ve miktarlar "
+             "SQL ile artırılır; aynı satırlara eşzamanlı aktarımlar birbirinin güncellemesini ezemez.")
 
+    # Background confirmation: the cron 'import_shipment.ir_cron_import_shipment_excel_jobs'
+    # allocates the valid lines in chunks, each in a savepoint, and commits the
+    # allocation together with job_offset, so a resumed job starts after the last
+    # committed chunk and never adds its quantities to imported_qty twice.
+    job_state = fields.Selection([
+        ('queued', 'Sırada'),
+        ('running', 'Çalışıyor'),
+        ('done', 'Tamamlandı'),
+        ('failed', 'Hata')
+    ], string='Arka Plan Durumu', readonly=True)
+    job_offset = fields.Integer(string='İşlenen Satır', readonly=True)
+    job_total = fields.Integer(string='Toplam Satır', readonly=True)
+    job_progress = fields.Float(string='İlerleme', readonly=True)
+    job_message = fields.Text(string='Arka Plan Mesajı', readonly=True)
+
+    # Line counters per state, recomputed with one grouped query when lines
+    # change state; shown next to the status filter.
+    line_count = fields.Integer(string='Tümü', compute='_compute_line_counts', store=True)
+    pending_count = fields.Integer(string='Beklemede', compute='_compute_line_counts', store=True)
+    success_count = fields.Integer(string='Başarılı', compute='_compute_line_counts', store=True)
+    warning_count = fields.Integer(string='Kontrol', compute='_compute_line_counts', store=True)
+    failed_count = fields.Integer(string='Başarısız', compute='_compute_line_counts', store=True)
+
+    # Preview paging: only the lines of the current page (and status filter) are
+    # sent to the form, fetched with the (wizard_id, state) index.
+    page = fields.Integer(string='Sayfa', default=1)
+    page_size = fields.Integer(string='Sayfa Boyutu', default=80)
+    page_count = fields.Integer(string='Sayfa Sayısı', compute='_compute_display_line_ids')
     display_line_ids = fields.Many2many('import.shipment.excel.line', compute='_compute_display_line_ids', string='Görüntülenen Satırlar')
 
-    @api.depends('line_ids', 'line_filter', 'line_ids.state')
+    @api.depends('line_ids.state')
+    def _compute_line_counts(self):
+        counts = {}
+        wizard_ids = [wizard_id for wizard_id in self._origin.ids if wizard_id]
+        if wizard_ids:
+            groups = self.env['import.shipment.excel.line']._read_group(
+                [('wizard_id', 'in', wizard_ids)],
+                ['wizard_id', 'state'],
+                ['wizard_id', 'state'],
+                lazy=False,
+            )
+            for group in groups:
+                counts[(group['wizard_id'][0], group['state'])] = group['__count']
+        for wizard in self:
+            wizard_id = wizard._origin.id
+            wizard.pending_count = counts.get((wizard_id, 'pending'), 0)
+            wizard.success_count = counts.get((wizard_id, 'success'), 0)
+            wizard.warning_count = counts.get((wizard_id, 'warning'), 0)
+            wizard.failed_count = counts.get((wizard_id, 'failed'), 0)
+            wizard.line_count = (wizard.pending_count + wizard.success_count
+                                 + wizard.warning_count + wizard.failed_count)
+
+    @api.depends('line_filter', 'page', 'page_size', 'line_count', 'pending_count',
+                 'success_count', 'warning_count', 'failed_count')
     def _compute_display_line_ids(self):
+        ExcelLine = self.env['import.shipment.excel.line']
         for wizard in self:
-            if not wizard.line_filter or wizard.line_filter == 'all':
-                wizard.display_line_ids = wizard.line_ids
-            else:
-                wizard.display_line_ids = wizard.line_ids.filtered(lambda l: l.state == wizard.line_filter)
+            if not wizard._origin.id:
+                wizard.display_line_ids = ExcelLine
+                wizard.page_count = 0
+                continue
+            domain = [('wizard_id', '=', wizard._origin.id)]
+            count = wizard.line_count
+            if wizard.line_filter and wizard.line_filter != 'all':
+                domain.append(('state', '=', wizard.line_filter))
+                count = wizard['%s_count' % wizard.line_filter]
+            page_size = max(wizard.page_size, 1)
+            wizard.page_count = max(1, -(-count // page_size))
+            page = min(max(wizard.page, 1), wizard.page_count)
+            wizard.display_line_ids = ExcelLine.search(domain, offset=(page - 1) * page_size, limit=page_size, order='id')
+
+    @api.onchange('line_filter')
+    def _onchange_line_filter(self):
+        self.page = 1
+
+    def action_next_page(self):
+        self.ensure_one()
+        self.page = min(self.page + 1, self.page_count)
+        return self._reopen_wizard()
+
+    def action_previous_page(self):
+        self.ensure_one()
+        self.page = max(self.page - 1, 1)
+        return self._reopen_wizard()
 
     # Column mapping (0-based): 
     # 0=Ref(PO-Pref), 1=Quantity, 2=Price, 3=Date
@@ -91,35 +183,158 @@ class ImportShipmentExcelWizard(models.TransientModel):
             price = float(sheet.cell_value(row_index, 2) or 0.0)
             
             # Date handling
-            date_val = sheet.cell_value(row_index, 3)
-            date_obj = False
-            if date_val:
-                if sheet.cell_type(row_index, 3) == xlrd.XL_CELL_DATE:
-                    date_tuple = xlrd.xldate_as_tuple(date_val, sheet.book.datemode)
-                    date_obj = fields.Datetime.to_datetime("%04d-%02d-%02d %02d:%02d:%02d" % date_tuple)
-                else:
-                    date_obj = fields.Datetime.to_datetime(str(date_val))
+            date_obj = self._parse_excel_date(
+                sheet.cell_value(row_index, 3), sheet.cell_type(row_index, 3), sheet.book.datemode)
             
             return ref, qty, price, date_obj, '', 'pending'
         except Exception as e:
             return '', 0.0, 0.0, False, str(e), 'failed'
 
-    def action_preview(self):
-        """ Parses the Excel file and populates the preview lines. """
+    def _parse_excel_date(self, date_val, ctype, datemode):
+        """ Converts the value of a date cell, shared by both parsers.
+        Empty values (including 0) give False; invalid values raise. """
+        if not date_val:
+            return False
+        if ctype == xlrd.XL_CELL_DATE:
+            date_tuple = xlrd.xldate_as_tuple(date_val, datemode)
+            return fields.Datetime.to_datetime("%04d-%02d-%02d %02d:%02d:%02d" % date_tuple)
+        return fields.Datetime.to_datetime(str(date_val))
+
+    def _parse_excel_columns(self, sheet):
+        """ Column-wise equivalent of _parse_excel_row for the whole sheet (NumPy).
+        Whole columns are read at once, converted in one pass and per-row errors
+        are reported from boolean masks.
+        Returns a list of (ref, qty, price, date, message, status) tuples. """
+        row_count = sheet.nrows - 1  # Skip header
+        if row_count <= 0:
+            return []
+
+        def column(col_index):
+            return sheet.col_values(col_index, 1), np.array(sheet.col_types(col_index, 1))
+
+        errors_by_row = {}
+
+        # Reference: numbers as integers, text stripped
+        ref_values, ref_types = column(0)
+        refs = [
+            str(int(value)) if ctype == xlrd.XL_CELL_NUMBER else (str(value).strip() if value else '')
+            for value, ctype in zip(ref_values, ref_types)
+        ]
+
+        def float_column(col_index):
+            values, _types = column(col_index)
+            cells = np.array(values, dtype=object)
+            cells[(cells == '') | np.equal(cells, None)] = 0.0
+            try:
+                return cells.astype(float)
+            except (TypeError, ValueError):
+                # Slow path only for columns that contain unparsable text
+                result = np.zeros(row_count)
+                for row, value in enumerate(cells):
+                    try:
+                        result[row] = float(value)
+                    except (TypeError, ValueError) as e:
+                        errors_by_row.setdefault(row, str(e))
+                return result
+
+        qtys = float_column(1)
+        prices = float_column(2)
+
+        # Dates: Excel serials converted in one vectorized operation, with the
+        # rounding of xlrd.xldate_as_tuple. Serials it does not turn into a
+        # full date (time only, ambiguous 1900 dates, too large) and text cells
+        # go through _parse_excel_date, so they fail or pass as in the row parser.
+        date_values, date_types = column(3)
+        datemode = sheet.book.datemode
+        dates = np.full(row_count, None, dtype=object)
+        date_cells = np.array(date_values, dtype=object)
+        filled_mask = np.array([bool(value) for value in date_values], dtype=bool)
+        serial_mask = filled_mask & (date_types == xlrd.XL_CELL_DATE) & (datemode in EXCEL_MIN_DATE_DAYS)
+        if serial_mask.any():
+            serial_rows = np.flatnonzero(serial_mask)
+            serials = date_cells[serial_rows].astype(float)
+            days = np.floor(serials)
+            with np.errstate(invalid='ignore'):  # inf/nan serials are left to the row logic
+                seconds = np.round((serials - days) * 86400.0)
+            carry = seconds == 86400.0
+            days[carry] += 1
+            seconds[carry] = 0
+            valid = (serials > 0) & (days >= EXCEL_MIN_DATE_DAYS[datemode]) & (days < EXCEL_MAX_DATE_DAYS[datemode])
+            serial_rows = serial_rows[valid]
+            epoch = np.datetime64('1904-01-01' if datemode else '1899-12-30', 's')
+            offsets = (days[valid] * 86400 + seconds[valid]).astype('int64').astype('timedelta64[s]')
+            dates[serial_rows] = (epoch + offsets).astype(object)
+            filled_mask[serial_rows] = False
+        for row in np.flatnonzero(filled_mask):
+            try:
+                dates[row] = self._parse_excel_date(date_cells[row], date_types[row], datemode)
+            except Exception as e:
+                errors_by_row.setdefault(int(row), str(e))
+
+        result = []
+        for row in range(row_count):
+            if row in errors_by_row:
+                result.append(('', 0.0, 0.0, False, errors_by_row[row], 'failed'))
+            else:
+                result.append((refs[row], float(qtys[row]), float(prices[row]), dates[row] or False, '', 'pending'))
+        return result
+
+    def _get_import_attachment(self):
+        """ Returns the filestore attachment holding the uploaded file. """
         self.ensure_one()
-        if not self.import_file:
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'import_file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+
+    @contextmanager
+    def _open_import_file(self):
+        """ Yields the uploaded file contents without decoding the base64 value:
+        files in the filestore are memory-mapped, attachments stored in the
+        database are returned as raw bytes. """
+        attachment = self._get_import_attachment()
+        if not attachment:
             raise UserError(_("Lütfen bir Excel dosyası yükleyin."))
+        if not attachment.store_fname or not attachment.file_size:
+            yield attachment.raw
+            return
+        with open(attachment._full_path(attachment.store_fname), 'rb') as import_file, \
+                mmap.mmap(import_file.fileno(), 0, access=mmap.ACCESS_READ) as file_data:
+            yield file_data
 
+    def _parse_import_file(self, file_data):
+        """ Parses the first sheet of the file into JSON serializable
+        (ref, qty, price, date, message, status) rows. """
         try:
-            file_data = base64.b64decode(self.import_file)
             workbook = xlrd.open_workbook(file_contents=file_data)
             sheet = workbook.sheet_by_index(0)
         except Exception as e:
             raise UserError(_("Excel dosyası okunamadı. Hata: %s") % str(e))
 
+        if np is not None and sheet.ncols >= 4:
+            parsed_rows = self._parse_excel_columns(sheet)
+        else:
+            parsed_rows = (self._parse_excel_row(sheet, row_index) for row_index in range(1, sheet.nrows)) # Skip header
+        return [
+            (ref, qty, price, fields.Datetime.to_string(date) if date else False, message, status)
+            for ref, qty, price, date, message, status in parsed_rows
+        ]
+
+    def action_preview(self):
+        """ Parses the Excel file and populates the preview lines. """
+        self.ensure_one()
+        self._check_no_job()
+        ParseCache = self.env['import.shipment.parse.cache'].sudo()
+        with self._open_import_file() as file_data:
+            checksum = hashlib.sha256(file_data).hexdigest()
+            parsed_rows = ParseCache._lookup(checksum, PARSER_VERSION)
+            if parsed_rows is None:
+                parsed_rows = self._parse_import_file(file_data)
+                ParseCache._store(checksum, PARSER_VERSION, parsed_rows)
+
         preview_vals = []
-        for row_index in range(1, sheet.nrows): # Skip header
-            ref_val, qty_val, price_val, date_val, message, status = self._parse_excel_row(sheet, row_index)
+        for ref_val, qty_val, price_val, date_val, message, status in parsed_rows:
             preview_vals.append((0, 0, {
                 'reference': ref_val,
                 'quantity': qty_val,
@@ -131,33 +346,30 @@ class ImportShipmentExcelWizard(models.TransientModel):
         
         self.write({
             'line_ids': [(5, 0, 0)] + preview_vals,
-            'state': 'draft'
+            'state': 'draft',
+            'page': 1,
         })
         
         return self._reopen_wizard()
 
     def action_validate(self):
         self.ensure_one()
+        self._check_no_job()
         # Group result lines by Reference to handle total quantities
-        grouped_lines = {}
+        grouped_ids = {}
         for line in self.line_ids:
-            if line.reference not in grouped_lines:
-                grouped_lines[line.reference] = self.env['import.shipment.excel.line']
-            grouped_lines[line.reference] |= line
+            grouped_ids.setdefault(line.reference, []).append(line.id)
+
+        ExcelLine = self.env['import.shipment.excel.line']
+        matches_map = self._match_references(grouped_ids.keys())
 
-        for ref, lines in grouped_lines.items():
+        # Collect line ids per identical result so each outcome is written once
+        write_groups = {}
+        for ref, line_ids in grouped_ids.items():
+            lines = ExcelLine.browse(line_ids)
             total_excel_qty = sum(lines.mapped('quantity'))
             excel_price = lines[0].excel_price
-            
-            # Determine search domain based on transfer method
-            domain = [('state', 'not in', ['done', 'imported', 'cancel'])]
-            if self.transfer_method == 'order':
-                domain.append(('name', '=', ref))
-            else:
-                # FIFO matches product manufacturer prefix
-                domain.append(('manufacturer_pref', '=', ref))
-
-            target_lines = self.env['import.shipment'].search(domain, order='expected_date asc, id asc')
+            target_lines = matches_map.get(ref)
             
             if target_lines:
                 total_ordered = sum(target_lines.mapped('ordered_qty'))
@@ -176,17 +388,16 @@ class ImportShipmentExcelWizard(models.TransientModel):
                 if not msgs:
                     msgs.append(_('Eşleşme bulundu (%s satıra dağıtılacak)') % len(target_lines))
 
-                lines.write({
-                    'match_ids': [(6, 0, target_lines.ids)],
-                    'odoo_price': odoo_price,
-                    'state': state,
-                    'message': ' | '.join(msgs)
-                })
+                key = (tuple(target_lines.ids), odoo_price, state, ' | '.join(msgs))
             else:
-                lines.write({
-                    'state': 'failed', 
-                    'message': _('Eşleşen sevkiyat satırı bulunamadı.')
-                })
+                key = ((), 0.0, 'failed', _('Eşleşen sevkiyat satırı bulunamadı.'))
+            write_groups.setdefault(key, []).extend(line_ids)
+
+        for (match_ids, odoo_price, state, message), line_ids in write_groups.items():
+            vals = {'state': state, 'message': message}
+            if match_ids:
+                vals.update({'match_ids': [(6, 0, list(match_ids))], 'odoo_price': odoo_price})
+            ExcelLine.browse(line_ids).write(vals)
 
         # Set default picking type from the first matched line's PO
         first_match = self.line_ids.filtered(lambda l: l.match_ids).mapped('match_ids').sorted('id')
@@ -199,38 +410,55 @@ class ImportShipmentExcelWizard(models.TransientModel):
         self.write({'state': 'validated'})
         return self._reopen_wizard()
 
+    def _match_references(self, references):
+        """ Fetches the open shipments of all references in a single query
+        (ordered by expected_date, id) and buckets them by reference.
+        Matches on 'name' (order-based) or 'manufacturer_pref' (FIFO).
+        Returns a dict: reference -> import.shipment recordset """
+        refs = list({ref for ref in references if ref})
+        if not refs:
+            return {}
+        key_field = 'name' if self.transfer_method == 'order' else 'manufacturer_pref'
+        target_lines = self.env['import.shipment'].search([
+            ('state', 'not in', ['done', 'imported', 'cancel']),
+            (key_field, 'in', refs),
+        ], order='expected_date asc, id asc')
+        ids_map = {}
+        for target in target_lines:
+            ids_map.setdefault(target[key_field], []).append(target.id)
+        return {ref: self.env['import.shipment'].browse(ids) for ref, ids in ids_map.items()}
+
+    def _get_valid_lines(self):
+        return self.line_ids.filtered(lambda l: l.state in ['success', 'warning']).sorted('id')
+
+    def _check_no_job(self):
+        """ Lines of a started background confirmation are already (partly) imported:
+        the job must be resumed, not restarted. """
+        for wizard in self:
+            if wizard.job_state in ('queued', 'running') or (wizard.job_state == 'failed' and wizard.job_offset):
+                raise UserError(_("Bu dosyanın sevkiyat miktarları arka planda aktarılıyor veya aktarım yarıda kaldı. "
+                                  "Aktarılan satırlar tekrar işlenmesin diye işi kaldığı yerden devam ettirin."))
+
     def action_confirm(self):
         self.ensure_one()
-        valid_lines = self.line_ids.filtered(lambda l: l.state in ['success', 'warning'])
+        self._check_no_job()
+        valid_lines = self._get_valid_lines()
         if not valid_lines:
             raise UserError(_("Aktarılacak geçerli satırı yok."))
 
-        # Compile distribution map across ALL lines
-        shipments_map = {}
-        shipments_to_process = self.env['import.shipment']
-        move_dates_map = {} # sl.id -> date
+        pickings = self._confirm_lines(valid_lines, locked=self.allocation_mode == 'locked')
+
+        self.write({'state': 'done'})
         
-        for line in valid_lines:
-            remaining_qty = line.quantity
-            sorted_targets = line.match_ids.sorted(lambda l: (l.expected_date or fields.Date.today(), l.id))
+        if pickings:
+            return self._open_pickings(pickings)
             
-            for idx, sl in enumerate(sorted_targets):
-                if remaining_qty <= 0:
-                    break
-                
-                open_qty_for_this = max(0, sl.ordered_qty - sl.imported_qty)
-                if idx == len(sorted_targets) - 1:
-                    qty_to_write = remaining_qty
-                else:
-                    qty_to_write = min(open_qty_for_this, remaining_qty)
-                
-                if qty_to_write > 0:
-                    sl.imported_qty += qty_to_write
-                    shipments_to_process |= sl
-                    shipments_map[sl.id] = shipments_map.get(sl.id, 0.0) + qty_to_write
-                    # Keep the date from Excel line for this shipment distribution
-                    move_dates_map[sl.id] = line.date
-                    remaining_qty -= qty_to_write
+        return {'type': 'ir.actions.act_window_close'}
+
+    def _confirm_lines(self, valid_lines, locked=False):
+        """ Allocates the quantities of valid_lines and creates their incoming pickings.
+        Returns the created pickings. """
+        shipments_to_process, shipments_map, move_dates_map = self._allocate(valid_lines, locked=locked)
 
         pickings = self.env['stock.picking']
         if shipments_to_process:
@@ -239,30 +467,178 @@ class ImportShipmentExcelWizard(models.TransientModel):
                 items_qty_map=shipments_map,
                 move_dates_map=move_dates_map
             ).create_incoming_picking(picking_type_id=self.picking_type_id)
+        return pickings
 
-        self.write({'state': 'done'})
-        
-        if pickings:
-            return {
-                'name': _('Incoming Pickings'),
-                'type': 'ir.actions.act_window',
-                'res_model': 'stock.picking',
-                'view_mode': 'tree,form',
-                'domain': [('id', 'in', pickings.ids)],
-            }
-            
-        return {'type': 'ir.actions.act_window_close'}
+    def _open_pickings(self, pickings):
+        return {
+            'name': _('Incoming Pickings'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'stock.picking',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', pickings.ids)],
+        }
+
+    def action_open_pickings(self):
+        self.ensure_one()
+        return self._open_pickings(self.picking_ids)
+
+    def _allocate(self, valid_lines, locked=False):
+        """ Plans the distribution across ALL lines in memory, then applies it once.
+        locked: lock the target shipments first and apply atomic increments.
+        A lock timeout, deadlock or serialization failure against a concurrent
+        import is not retried here: the snapshot of the transaction is stale, so
+        only a new transaction can succeed. The server retries the request (and
+        _run_job the chunk) in a new transaction.
+        Returns (shipments, items_qty_map, move_dates_map) """
+        shipments = valid_lines.mapped('match_ids')
+        if locked:
+            shipments._lock_for_allocation()
+
+        today = fields.Date.today()
+        shipments_data = {
+            sl.id: (sl.ordered_qty - sl.imported_qty, sl.expected_date or today)
+            for sl in shipments
+        }
+        rows = [(line.id, line.quantity, line.match_ids.ids) for line in valid_lines]
+        shipments_map, last_rows = plan_fifo_allocation(rows, shipments_data)
+
+        if locked:
+            shipments_to_process = self.env['import.shipment']._increment_imported_qty(shipments_map)
+        else:
+            shipments_to_process = self._apply_allocation_plan(shipments_map)
+        # Keep the date from the (last) Excel line of each shipment distribution
+        line_dates = {line.id: line.date for line in valid_lines}
+        move_dates_map = {sl_id: line_dates[row_key] for sl_id, row_key in last_rows.items()}
+        return shipments_to_process, shipments_map, move_dates_map
+
+    def _apply_allocation_plan(self, allocations):
+        """ Adds the planned quantities to imported_qty, with one write per
+        resulting value (so once per shipment at most). Returns the shipments. """
+        shipments = self.env['import.shipment'].browse(list(allocations))
+        shipments_by_qty = {}
+        for sl in shipments:
+            new_qty = sl.imported_qty + allocations[sl.id]
+            shipments_by_qty.setdefault(new_qty, []).append(sl.id)
+        for new_qty, shipment_ids in shipments_by_qty.items():
+            self.env['import.shipment'].browse(shipment_ids).write({'imported_qty': new_qty})
+        return shipments
 
     def action_reset(self):
-        self.write({'state': 'draft', 'line_ids': [(5, 0, 0)]})
+        self._check_no_job()
+        self.write({
+            'state': 'draft',
+            'line_ids': [(5, 0, 0)],
+            'picking_ids': [(5, 0, 0)],
+            'page': 1,
+            'job_state': False,
+            'job_offset': 0,
+            'job_total': 0,
+            'job_progress': 0.0,
+            'job_message': False,
+        })
         return self._reopen_wizard()
 
-    def _reopen_wizard(self):
-        ctx = dict(self.env.context)
-        ctx.update({
-            'wizard_id': self.id,
-            'force_refresh': fields.Datetime.now() # Force web client metadata refresh
+    # ------------------------------------------------------------------
+    # Background confirmation
+    # ------------------------------------------------------------------
+
+    def action_confirm_async(self):
+        """ Queues the confirmation for the background job. """
+        self.ensure_one()
+        self._check_no_job()
+        valid_count = len(self._get_valid_lines())
+        if not valid_count:
+            raise UserError(_("Aktarılacak geçerli satırı yok."))
+        self.write({
+            'job_offset': 0,
+            'job_total': valid_count,
+            'job_progress': 0.0,
         })
+        return self._enqueue_job()
+
+    def action_resume_job(self):
+        """ Restarts a failed background confirmation after its last checkpoint. """
+        self.ensure_one()
+        if self.job_state != 'failed':
+            raise UserError(_("Hata ile durmuş bir arka plan onayı yok."))
+        return self._enqueue_job()
+
+    def action_refresh(self):
+        self.ensure_one()
+        return self._reopen_wizard()
+
+    def _enqueue_job(self):
+        self.write({'job_state': 'queued', 'job_message': False})
+        self.env.ref('import_shipment.ir_cron_import_shipment_excel_jobs')._trigger()
+        return self._reopen_wizard()
+
+    def _transient_clean_rows_older_than(self, seconds):
+        # Standard age-based cleanup, unfinished jobs excluded by UNFINISHED_JOB_SQL
+        self._cr.execute("""
+            SELECT wizard.id
+              FROM import_shipment_excel_wizard wizard
+             WHERE COALESCE(wizard.write_date, wizard.create_date, (now() AT TIME ZONE 'UTC'))::timestamp
+                   < (now() AT TIME ZONE 'UTC') - interval %s
+               AND NOT {unfinished}
+        """.format(unfinished=UNFINISHED_JOB_SQL), ["%s seconds" % max(seconds, 300)])
+        self.sudo().browse([row[0] for row in self._cr.fetchall()]).unlink()
+
+    @api.model
+    def _cron_process_jobs(self):
+        # 'running' jobs were interrupted (crash, time limit): resume them as well
+        wizards = self.search([('job_state', 'in', ['queued', 'running'])], order='id')
+        for wizard in wizards:
+            wizard.with_user(wizard.create_uid)._run_job()
+
+    def _run_job(self):
+        """ Runs the confirmation chunk by chunk from the last checkpoint (job_offset).
+        A chunk's allocation, pickings and checkpoint are committed together.
+        A chunk that conflicts with a concurrent import of the same shipments
+        (serialization failure, lock timeout, deadlock) is retried from the same
+        checkpoint in a new transaction, with backoff, as the server retries
+        requests; any other failure, or running out of tries, rolls the chunk
+        back and marks the job failed. """
+        self.ensure_one()
+        valid_lines = self._get_valid_lines()
+        tries = 0
+        while self.job_state in ('queued', 'running'):
+            try:
+                with self.env.cr.savepoint():
+                    self._run_job_chunk(valid_lines)
+                tries = 0
+            except (errors.SerializationFailure, errors.LockNotAvailable, errors.DeadlockDetected) as e:
+                # The snapshot is stale: only a new transaction can see the
+                # other import's changes (the previous chunks are committed)
+                self.env.cr.rollback()
+                tries += 1
+                if tries < ALLOCATION_MAX_TRIES:
+                    _logger.info("Import shipment Excel job of wizard %s: %s, retry %s/%s at row %s",
+                                 self.id, e.__class__.__name__, tries, ALLOCATION_MAX_TRIES, self.job_offset)
+                    time.sleep(random.uniform(0.0, 0.5 * 2 ** tries))
+                    continue
+                _logger.exception("Import shipment Excel job failed for wizard %s at row %s", self.id, self.job_offset)
+                self.write({'job_state': 'failed', 'job_message': str(e)})
+            except Exception as e:
+                self.env.invalidate_all()
+                _logger.exception("Import shipment Excel job failed for wizard %s at row %s", self.id, self.job_offset)
+                self.write({'job_state': 'failed', 'job_message': str(e)})
+            self.env.cr.commit()
+
+    def _run_job_chunk(self, valid_lines):
+        self.job_state = 'running'
+        total = len(valid_lines)
+        stop = min(self.job_offset + JOB_CHUNK_SIZE, total)
+        pickings = self._confirm_lines(valid_lines[self.job_offset:stop], locked=True)
+        vals = {
+            'job_offset': stop,
+            'job_progress': 100.0 * stop / total if total else 100.0,
+            'picking_ids': [(4, picking_id) for picking_id in pickings.ids],
+        }
+        if stop >= total:
+            vals.update({'state': 'done', 'job_state': 'done'})
+        self.write(vals)
+
+    def _reopen_wizard(self):
         return {
             'name': _('Excel ile Aktar'),
             'type': 'ir.actions.act_window',
@@ -270,7 +646,7 @@ class ImportShipmentExcelWizard(models.TransientModel):
             'view_mode': 'form',
             'target': 'new',
             'res_id': self.id,
-            'context': ctx,
+            'context': dict(self.env.context),
         }
 
 class ImportShipmentExcelLine(models.TransientModel):
@@ -292,3 +668,20 @@ class ImportShipmentExcelLine(models.TransientModel):
         ('failed', 'Başarısız')
     ], string='Durum', default='pending')
     message = fields.Char(string='Mesaj')
+
+    def _transient_clean_rows_older_than(self, seconds):
+        # Valid lines are re-read by a resumed job: keep them while their wizard is kept
+        self._cr.execute("""
+            SELECT line.id
+              FROM import_shipment_excel_line line
+         LEFT JOIN import_shipment_excel_wizard wizard ON wizard.id = line.wizard_id
+             WHERE COALESCE(line.write_date, line.create_date, (now() AT TIME ZONE 'UTC'))::timestamp
+                   < (now() AT TIME ZONE 'UTC') - interval %s
+               AND NOT {unfinished}
+        """.format(unfinished=UNFINISHED_JOB_SQL), ["%s seconds" % max(seconds, 300)])
+        self.sudo().browse([row[0] for row in self._cr.fetchall()]).unlink()
+
+    def init(self):
+        # Preview pages and state counters are always read per wizard and state
+        tools.create_index(self._cr, 'import_shipment_excel_line_wizard_id_state_index',
+                           self._table, ['wizard_id', 'state'])